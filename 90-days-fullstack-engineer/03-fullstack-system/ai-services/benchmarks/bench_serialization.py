@@ -0,0 +1,58 @@
+# Per-response CPU cost of turning an analysis into JSON bytes: FastAPI's default response_model path
+# (dict -> validate -> jsonable_encoder -> json.dumps) versus ModelJSONResponse (validate once -> pydantic-core).
+#   python -m benchmarks.bench_serialization --iterations 100000 --tags 20
+import argparse
+import asyncio
+import json
+import time
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from main import ModelJSONResponse
+from schemas import AnalyzeResponse
+
+RESPONSE_FIELD = create_response_field(name='response', type_=AnalyzeResponse)
+
+async def default_path(analysis: dict) -> bytes:
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=dict(analysis))
+    return JSONResponse(content).body
+
+async def fast_path(analysis: dict) -> bytes:
+    return ModelJSONResponse(AnalyzeResponse(**analysis)).body
+
+async def measure(operation, analysis: dict, iterations: int) -> float:
+    for _ in range(min(iterations, 1000)):
+        await operation(analysis)
+    started = time.process_time()
+    for _ in range(iterations):
+        await operation(analysis)
+    return (time.process_time() - started) / iterations * 1_000_000
+
+async def run(iterations: int, tags: int) -> dict:
+    analysis = {
+        'document_id': 1,
+        'summary': 'A summary of the listing ' * 8,
+        'score': 0.85,
+        'tags': [f'tag-{index}' for index in range(tags)],
+        'warnings': [],
+    }
+    assert json.loads(await default_path(analysis)) == json.loads(await fast_path(analysis))
+    before = await measure(default_path, analysis, iterations)
+    after = await measure(fast_path, analysis, iterations)
+    return {
+        'tags': tags,
+        'iterations': iterations,
+        'before_us_per_response': round(before, 3),
+        'after_us_per_response': round(after, 3),
+        'saved_us_per_response': round(before - after, 3),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=100_000)
+    parser.add_argument('--tags', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations, args.tags)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# Per-request CPU cost of handing a validated AnalyzeRequest to the service layer.
+#   python -m benchmarks.bench_validation --iterations 200000 --content-length 500
+import argparse
+import json
+import time
+from pydantic import BaseModel
+from schemas import AnalyzeRequest
+
+class LegacyServiceRequest(BaseModel):
+    # The unconstrained copy services/ai_service.py used to rebuild from `payload.dict()`.
+    document_id: int
+    title: str
+    content: str
+
+def legacy_handoff(body: bytes):
+    request = AnalyzeRequest.model_validate_json(body)
+    return LegacyServiceRequest(**request.dict())
+
+def handoff(body: bytes):
+    return AnalyzeRequest.model_validate_json(body)
+
+def measure(operation, body: bytes, iterations: int) -> float:
+    for _ in range(min(iterations, 1000)):
+        operation(body)
+    started = time.process_time()
+    for _ in range(iterations):
+        operation(body)
+    return (time.process_time() - started) / iterations * 1_000_000
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=100_000)
+    parser.add_argument('--content-length', type=int, default=200)
+    args = parser.parse_args()
+    body = json.dumps({'document_id': 1, 'title': 'Listing title', 'content': 'x' * args.content_length}).encode()
+    before = measure(legacy_handoff, body, args.iterations)
+    after = measure(handoff, body, args.iterations)
+    print(json.dumps({
+        'content_length': args.content_length,
+        'iterations': args.iterations,
+        'before_us_per_request': round(before, 3),
+        'after_us_per_request': round(after, 3),
+        'saved_us_per_request': round(before - after, 3),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# Boots the stub provider and main:app in separate processes, drives POST /analyze with concurrent
+# clients and reports throughput, latency percentiles and error rates as JSON.
+#   python -m benchmarks.loadtest --concurrency 50 --duration 20 --provider-latency-ms 300 \
+#       --provider-error-rate 0.02 --distinct-documents 1000 --output results.json
+# Extra service settings can be passed as --env NAME=VALUE (e.g. --env MODEL_BATCH_MAX_SIZE=16).
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+import httpx
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+# Status key for 200s that carry warnings: a stale or local fallback answer rather than a fresh analysis.
+DEGRADED = '200 degraded'
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(module: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', f'{module}:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=SERVICE_DIR,
+        # No L2 result cache unless asked for: a results.db left in the service directory would turn the
+        # next run's model calls into cache hits. No local fallback either, so provider errors show up as errors.
+        env={'RESULT_CACHE_L2': 'off', 'LOCAL_FALLBACK': '0', **os.environ, **env},
+    )
+
+async def wait_until_ready(url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f'{url} did not come up within {timeout}s')
+
+def percentile(sorted_values: list[float], fraction: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def drive(base_url: str, concurrency: int, duration: float, distinct_documents: int, timeout_ms: int | None):
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    counter = 0
+    stop_at = time.monotonic() + duration
+    headers = {'X-Request-Timeout': str(timeout_ms)} if timeout_ms else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal counter
+        while time.monotonic() < stop_at:
+            counter += 1
+            document_id = counter % distinct_documents + 1
+            payload = {
+                'document_id': document_id,
+                'title': f'Listing {document_id}',
+                'content': f'Load test listing {document_id} ' + 'with a reasonably long description ' * 4,
+            }
+            started = time.perf_counter()
+            try:
+                response = await client.post('/analyze', json=payload, headers=headers)
+                degraded = response.status_code == 200 and response.json().get('warnings')
+                statuses[DEGRADED if degraded else str(response.status_code)] += 1
+            except httpx.HTTPError as error:
+                statuses[type(error).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, statuses
+
+def summarize(elapsed: float, latencies: list[float], statuses: Counter, settings: dict) -> dict:
+    ordered = sorted(latencies)
+    total = len(latencies)
+    errors = total - statuses.get('200', 0) - statuses.get(DEGRADED, 0)
+
+    def ms(value: float | None) -> float | None:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'settings': settings,
+        'requests': total,
+        'elapsed_seconds': round(elapsed, 3),
+        'rps': round(total / elapsed, 2) if elapsed else 0,
+        'latency_ms': {
+            'p50': ms(percentile(ordered, 0.50)),
+            'p95': ms(percentile(ordered, 0.95)),
+            'p99': ms(percentile(ordered, 0.99)),
+            'max': ms(ordered[-1] if ordered else None),
+        },
+        'error_rate': round(errors / total, 4) if total else 0,
+        'degraded_rate': round(statuses.get(DEGRADED, 0) / total, 4) if total else 0,
+        'status_counts': dict(statuses),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10, help='seconds to drive load for')
+    parser.add_argument('--distinct-documents', type=int, default=1000, help='lower values exercise the cache')
+    parser.add_argument('--provider-latency-ms', type=float, default=300)
+    parser.add_argument('--provider-error-rate', type=float, default=0)
+    parser.add_argument('--request-timeout-ms', type=int, default=None)
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE', help='extra service setting')
+    parser.add_argument('--output', type=Path, default=None, help='write the JSON report here')
+    args = parser.parse_args()
+
+    provider_port, service_port = free_port(), free_port()
+    service_env = dict(setting.split('=', 1) for setting in args.env)
+    processes = [
+        start_server('stub_provider', provider_port, {
+            'STUB_LATENCY_MS': str(args.provider_latency_ms),
+            'STUB_ERROR_RATE': str(args.provider_error_rate),
+        }),
+        start_server('main', service_port, {'MODEL_PROVIDER_URL': f'http://127.0.0.1:{provider_port}', **service_env}),
+    ]
+    base_url = f'http://127.0.0.1:{service_port}'
+    try:
+        asyncio.run(wait_until_ready(f'http://127.0.0.1:{provider_port}/docs'))
+        asyncio.run(wait_until_ready(f'{base_url}/docs'))
+        elapsed, latencies, statuses = asyncio.run(
+            drive(base_url, args.concurrency, args.duration, args.distinct_documents, args.request_timeout_ms)
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    settings = {key: value for key, value in vars(args).items() if key != 'output'}
+    report = summarize(elapsed, latencies, statuses, settings)
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + '\n')
+    print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import os
+import tempfile
+from services.cpus import available_cpus
+
+# Worker processes serving on this host (serve.py sets it); per-process budgets are divided by it.
+WEB_CONCURRENCY = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '10'))
+
+# Content longer than CONTENT_MAX_CHARS (after normalization) is rejected with 413; content above
+# CHUNK_MAX_TOKENS is split and its chunks analyzed CHUNK_CONCURRENCY at a time.
+CONTENT_MAX_CHARS = int(os.getenv('CONTENT_MAX_CHARS', '200000'))
+# Raw content longer than this is rejected at validation, before any parsing or normalization work.
+CONTENT_RAW_MAX_CHARS = int(os.getenv('CONTENT_RAW_MAX_CHARS', str(CONTENT_MAX_CHARS * 2)))
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '2000'))
+CHUNK_CONCURRENCY = int(os.getenv('CHUNK_CONCURRENCY', '4'))
+
+# Local TF-IDF scorer behind POST /score, and the fallback answer when the provider fails (LOCAL_FALLBACK=1).
+# LOCAL_SCORER_IDF_PATH is a .npy of IDF weights fitted with `python -m services.local_scorer`; without it
+# every term weighs the same.
+LOCAL_FALLBACK = os.getenv('LOCAL_FALLBACK', '1') == '1'
+LOCAL_SCORER_FEATURES = int(os.getenv('LOCAL_SCORER_FEATURES', str(1 << 18)))
+LOCAL_SCORER_MAX_TAGS = int(os.getenv('LOCAL_SCORER_MAX_TAGS', '5'))
+LOCAL_SCORER_TITLE_WEIGHT = int(os.getenv('LOCAL_SCORER_TITLE_WEIGHT', '3'))
+LOCAL_SUMMARY_MAX_CHARS = int(os.getenv('LOCAL_SUMMARY_MAX_CHARS', '200'))
+LOCAL_SCORER_IDF_PATH = os.getenv('LOCAL_SCORER_IDF_PATH')
+SCORE_MAX_ITEMS = int(os.getenv('SCORE_MAX_ITEMS', '10000'))
+
+# Worker processes for CPU-bound steps (normalization, fingerprinting, local scoring); 0 runs them inline.
+# The default leaves one worker per core once WEB_CONCURRENCY web workers have taken theirs.
+CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', str(max(1, available_cpus() // WEB_CONCURRENCY))))
+CPU_POOL_MAX_PENDING = int(os.getenv('CPU_POOL_MAX_PENDING', '64'))
+CPU_POOL_INLINE_BELOW_CHARS = int(os.getenv('CPU_POOL_INLINE_BELOW_CHARS', '20000'))
+CPU_POOL_SHARED_MEMORY_ABOVE_CHARS = int(os.getenv('CPU_POOL_SHARED_MEMORY_ABOVE_CHARS', str(1024 * 1024)))
+
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv('RESULT_CACHE_TTL_SECONDS', '3600'))
+# L2 behind the in-process cache: off, sqlite (a file on local disk) or redis. serve.py defaults it to sqlite
+# when it starts several workers.
+RESULT_CACHE_L2 = os.getenv('RESULT_CACHE_L2', 'off')
+RESULT_CACHE_L2_PATH = os.getenv('RESULT_CACHE_L2_PATH', 'results.db')
+RESULT_CACHE_L2_TTL_SECONDS = float(os.getenv('RESULT_CACHE_L2_TTL_SECONDS', '86400'))
+RESULT_CACHE_STALE_WHILE_REVALIDATE_SECONDS = float(os.getenv('RESULT_CACHE_STALE_WHILE_REVALIDATE_SECONDS', '300'))
+RESULT_CACHE_STALE_IF_ERROR_SECONDS = float(os.getenv('RESULT_CACHE_STALE_IF_ERROR_SECONDS', '86400'))
+RESULT_CACHE_WRITE_QUEUE_MAX = int(os.getenv('RESULT_CACHE_WRITE_QUEUE_MAX', '1000'))
+
+# Circuit breaker state: memory (per process), sqlite (shared by the workers on one host) or redis.
+SHARED_STORE = os.getenv('SHARED_STORE', 'memory')
+SHARED_STORE_PATH = os.getenv('SHARED_STORE_PATH', 'shared.db')
+REDIS_URL = os.getenv('REDIS_URL')
+
+# Near-duplicate reuse (off by default): a cache miss within SIMILARITY_MAX_DISTANCE bits (SimHash) of an
+# indexed document, with the same numbers and an estimated shingle Jaccard of at least SIMILARITY_MIN_JACCARD,
+# reuses its cached analysis. The index lives in each worker process.
+NEAR_DUPLICATES = os.getenv('NEAR_DUPLICATES', '0') == '1'
+SIMILARITY_MAX_DISTANCE = int(os.getenv('SIMILARITY_MAX_DISTANCE', '4'))
+SIMILARITY_MIN_JACCARD = float(os.getenv('SIMILARITY_MIN_JACCARD', '0.9'))
+SIMILARITY_INDEX_MAX_ENTRIES = int(os.getenv('SIMILARITY_INDEX_MAX_ENTRIES', '100000'))
+
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv('RETRY_BASE_DELAY_SECONDS', '0.2'))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv('RETRY_MAX_DELAY_SECONDS', '2'))
+RETRY_TIMEOUT_SECONDS = float(os.getenv('RETRY_TIMEOUT_SECONDS', '5'))
+RETRY_BUDGET_CAPACITY = float(os.getenv('RETRY_BUDGET_CAPACITY', '20'))
+RETRY_BUDGET_REFILL_PER_SECOND = float(os.getenv('RETRY_BUDGET_REFILL_PER_SECOND', '2'))
+
+BREAKER_WINDOW_SIZE = int(os.getenv('BREAKER_WINDOW_SIZE', '20'))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', '10'))
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', '0.5'))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv('BREAKER_COOLDOWN_SECONDS', '30'))
+BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv('BREAKER_HALF_OPEN_MAX_CALLS', '1'))
+
+REQUEST_TIMEOUT_MS = int(os.getenv('REQUEST_TIMEOUT_MS', '10000'))
+REQUEST_MAX_TIMEOUT_MS = int(os.getenv('REQUEST_MAX_TIMEOUT_MS', '60000'))
+
+MODEL_PROVIDER_URL = os.getenv('MODEL_PROVIDER_URL')
+MODEL_API_KEY = os.getenv('MODEL_API_KEY')
+MODEL_MAX_CONNECTIONS = int(os.getenv('MODEL_MAX_CONNECTIONS', '100'))
+MODEL_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('MODEL_MAX_KEEPALIVE_CONNECTIONS', '20'))
+MODEL_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv('MODEL_KEEPALIVE_EXPIRY_SECONDS', '30'))
+MODEL_HTTP_TIMEOUT_SECONDS = float(os.getenv('MODEL_HTTP_TIMEOUT_SECONDS', '30'))
+
+# Host-wide model concurrency and queue sizes; each of the WEB_CONCURRENCY workers gets an even share.
+MODEL_CONCURRENCY_INITIAL = int(os.getenv('MODEL_CONCURRENCY_INITIAL', '20'))
+MODEL_CONCURRENCY_MIN = int(os.getenv('MODEL_CONCURRENCY_MIN', '1'))
+MODEL_CONCURRENCY_MAX = int(os.getenv('MODEL_CONCURRENCY_MAX', '200'))
+MODEL_LATENCY_TARGET_SECONDS = float(os.getenv('MODEL_LATENCY_TARGET_SECONDS', '2'))
+MODEL_CONCURRENCY_BACKOFF_RATIO = float(os.getenv('MODEL_CONCURRENCY_BACKOFF_RATIO', '0.9'))
+MODEL_QUEUE_MAX = int(os.getenv('MODEL_QUEUE_MAX', '200'))
+MODEL_QUEUE_TIMEOUT_SECONDS = float(os.getenv('MODEL_QUEUE_TIMEOUT_SECONDS', '1'))
+
+# Priority lanes in front of the model calls. MODEL_QUEUE_MAX / MODEL_QUEUE_TIMEOUT_SECONDS are the
+# interactive lane's queue; bulk waits longer in a larger queue but may hold at most LANE_BULK_MAX_SHARE
+# of the concurrency limit, and while both lanes wait, freed slots are shared by weight.
+LANE_INTERACTIVE_WEIGHT = float(os.getenv('LANE_INTERACTIVE_WEIGHT', '4'))
+LANE_BULK_WEIGHT = float(os.getenv('LANE_BULK_WEIGHT', '1'))
+LANE_BULK_MAX_SHARE = float(os.getenv('LANE_BULK_MAX_SHARE', '0.75'))
+LANE_BULK_QUEUE_MAX = int(os.getenv('LANE_BULK_QUEUE_MAX', '1000'))
+LANE_BULK_QUEUE_TIMEOUT_SECONDS = float(os.getenv('LANE_BULK_QUEUE_TIMEOUT_SECONDS', '30'))
+# 'key:class,...' pairs: requests carrying X-API-Key: key are always treated as that class.
+REQUEST_CLASS_API_KEYS = os.getenv('REQUEST_CLASS_API_KEYS', '')
+
+MODEL_BATCH_MAX_SIZE = int(os.getenv('MODEL_BATCH_MAX_SIZE', '1'))
+MODEL_BATCH_MAX_WAIT_MS = float(os.getenv('MODEL_BATCH_MAX_WAIT_MS', '10'))
+
+STREAM_CONCURRENCY = int(os.getenv('STREAM_CONCURRENCY', '10'))
+STREAM_MAX_LINE_BYTES = int(os.getenv('STREAM_MAX_LINE_BYTES', str(1024 * 1024)))
+
+JOB_BACKEND = os.getenv('JOB_BACKEND', 'memory')
+JOB_SQLITE_PATH = os.getenv('JOB_SQLITE_PATH', 'jobs.db')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', '1000'))
+JOB_RETENTION_SECONDS = float(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', '0.2'))
+# Requeue jobs left running by a previous run at startup; serve.py does it once and turns it off for its workers.
+JOB_RECOVER_RUNNING = os.getenv('JOB_RECOVER_RUNNING', '1') == '1'
+
+# Event loop lag is sampled every LOOP_MONITOR_INTERVAL_SECONDS; a loop stuck for LOOP_BLOCK_THRESHOLD_SECONDS
+# gets its stack logged. Percentiles cover the last LOOP_LAG_WINDOW samples. LOOP_MONITOR=0 turns it off.
+LOOP_MONITOR = os.getenv('LOOP_MONITOR', '1') == '1'
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.getenv('LOOP_MONITOR_INTERVAL_SECONDS', '0.1'))
+LOOP_BLOCK_THRESHOLD_SECONDS = float(os.getenv('LOOP_BLOCK_THRESHOLD_SECONDS', '0.25'))
+LOOP_LAG_WINDOW = int(os.getenv('LOOP_LAG_WINDOW', '600'))
+
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'ai-service-profiles'))
+
+# placeholder, http or simulated; defaults to http when MODEL_PROVIDER_URL is set.
+MODEL_PROVIDER = os.getenv('MODEL_PROVIDER', 'http' if MODEL_PROVIDER_URL else 'placeholder')
+SIM_SEED = int(os.getenv('SIM_SEED', '0'))
+SIM_LATENCY = os.getenv('SIM_LATENCY', 'fixed')
+SIM_LATENCY_MS = float(os.getenv('SIM_LATENCY_MS', '300'))
+SIM_LATENCY_SIGMA = float(os.getenv('SIM_LATENCY_SIGMA', '0.5'))
+SIM_SLOW_LATENCY_MS = float(os.getenv('SIM_SLOW_LATENCY_MS', '2000'))
+SIM_SLOW_FRACTION = float(os.getenv('SIM_SLOW_FRACTION', '0.05'))
+SIM_FAILURE_RATE = float(os.getenv('SIM_FAILURE_RATE', '0'))
+SIM_BURST_RATE = float(os.getenv('SIM_BURST_RATE', '0'))
+SIM_BURST_LENGTH = int(os.getenv('SIM_BURST_LENGTH', '10'))
+SIM_TIMEOUT_RATE = float(os.getenv('SIM_TIMEOUT_RATE', '0'))
+SIM_TIMEOUT_SECONDS = float(os.getenv('SIM_TIMEOUT_SECONDS', '60'))
+SIM_RATE_LIMIT_RPS = float(os.getenv('SIM_RATE_LIMIT_RPS', '0'))
@@ -1,31 +1,253 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from services.ai_service import analyze_document, AnalysisError
-
-app = FastAPI(title='AI Insights Service')
-
-class AnalyzeRequest(BaseModel):
-    document_id: int = Field(..., gt=0)
-    title: str = Field(..., min_length=5)
-    content: str = Field(..., min_length=50)
-
-class AnalyzeResponse(BaseModel):
-    document_id: int
-    summary: str
-    score: float
-    tags: list[str]
-    warnings: list[str] = []
-
-@app.post('/analyze', response_model=AnalyzeResponse)
-async def analyze(request: AnalyzeRequest):
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+import config
+from schemas import (
+    AnalyzeRequest,
+    AnalyzeResponse,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    BatchItemError,
+    BatchItemResult,
+    JobStatusResponse,
+    ScoreRequest,
+    ScoreResponse,
+    ScoreResult,
+)
+from services import ai_service
+from services.ai_service import analyze_document, analyze_batch, AnalysisError, result_cache
+from services import metrics
+from services import request_class
+from services.jobs import JobRunner, create_job_queue, SUCCEEDED, FAILED
+from services.loop_monitor import LoopMonitor
+from services.profiling import ProfilingMiddleware
+from services.streaming import NDJSONStreamingResponse, iter_ndjson, map_unordered
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if loop_monitor is not None:
+        await loop_monitor.start()
+    await ai_service.startup()
+    await job_runner.start()
+    yield
+    await job_runner.stop()
+    await ai_service.shutdown()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    metrics.mark_process_dead()
+
+app = FastAPI(title='AI Insights Service', lifespan=lifespan)
+app.router.route_class = metrics.InstrumentedRoute
+app.add_middleware(metrics.MetricsMiddleware)
+if config.PROFILE_TOKEN:
+    app.add_middleware(ProfilingMiddleware, token=config.PROFILE_TOKEN, output_dir=config.PROFILE_DIR)
+
+class ModelJSONResponse(JSONResponse):
+    # Serializes an already-validated model straight to bytes with pydantic-core. Returning a Response
+    # also skips FastAPI's response_model validation and jsonable_encoder pass.
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
+
+ERROR_CODES = {
+    400: 'INVALID_REQUEST',
+    404: 'JOB_NOT_FOUND',
+    409: 'JOB_NOT_FINISHED',
+    413: 'DOCUMENT_TOO_LARGE',
+    429: 'AI_SERVICE_OVERLOADED',
+    504: 'AI_SERVICE_TIMEOUT',
+}
+
+def error_code(status_code: int) -> str:
+    return ERROR_CODES.get(status_code, 'AI_SERVICE_ERROR')
+
+def request_timeout(timeout_ms: int | None) -> float:
+    # Callers pass their remaining latency budget in X-Request-Timeout (milliseconds).
+    return min(timeout_ms or config.REQUEST_TIMEOUT_MS, config.REQUEST_MAX_TIMEOUT_MS) / 1000
+
+def request_deadline(timeout_ms: int | None) -> float:
+    return time.monotonic() + request_timeout(timeout_ms)
+
+def error_entry(error: BaseException) -> dict:
+    if isinstance(error, AnalysisError):
+        return {'code': error_code(error.status_code), 'message': error.message}
+    return {'code': 'AI_SERVICE_ERROR', 'message': 'AI service encountered an unexpected error'}
+
+async def run_analysis_job(payload: dict) -> dict:
+    result = await analyze_document(AnalyzeRequest.model_validate(payload))
+    return result.model_dump()
+
+job_runner = JobRunner(
+    create_job_queue(
+        config.JOB_BACKEND,
+        config.JOB_SQLITE_PATH,
+        config.JOB_MAX_PENDING,
+        config.JOB_RETENTION_SECONDS,
+        config.JOB_POLL_INTERVAL_SECONDS,
+        config.JOB_RECOVER_RUNNING,
+    ),
+    handler=run_analysis_job,
+    describe_error=error_entry,
+    workers=config.JOB_WORKERS,
+)
+
+loop_monitor = LoopMonitor(
+    config.LOOP_MONITOR_INTERVAL_SECONDS, config.LOOP_BLOCK_THRESHOLD_SECONDS, config.LOOP_LAG_WINDOW
+) if config.LOOP_MONITOR else None
+
+def validation_message(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" if detail['loc'] else detail['msg']
+        for detail in error.errors()
+    )
+
+request_class_api_keys = request_class.parse_api_keys(config.REQUEST_CLASS_API_KEYS)
+
+def classify(default: str):
+    # Dependency that sets the request class for the model calls the endpoint makes. Async, so the
+    # context variable is set in the request's own task rather than in a threadpool copy.
+    async def set_request_class(
+        x_request_class: str | None = Header(None), x_api_key: str | None = Header(None)
+    ) -> str:
+        try:
+            resolved = request_class.resolve(x_request_class, x_api_key, request_class_api_keys, default)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+        request_class.current_class.set(resolved)
+        return resolved
+
+    return set_request_class
+
+def uses_cache(cache_control: str | None) -> bool:
+    # `Cache-Control: no-cache` forces a fresh model call; the result still refreshes the cache.
+    return not cache_control or 'no-cache' not in cache_control.lower()
+
+@app.post('/analyze', response_model=AnalyzeResponse, dependencies=[Depends(classify(request_class.INTERACTIVE))])
+async def analyze(
+    request: AnalyzeRequest,
+    cache_control: str | None = Header(None),
+    x_request_timeout: int | None = Header(None, gt=0),
+):
+    deadline = request_deadline(x_request_timeout)
     try:
-        return await analyze_document(request)
+        result = await analyze_document(request, use_cache=uses_cache(cache_control), deadline=deadline)
     except AnalysisError as error:
-        raise HTTPException(status_code=503, detail=error.message)
+        raise HTTPException(status_code=error.status_code, detail=error.message)
     except Exception as error:
         raise HTTPException(status_code=500, detail='AI service encountered an unexpected error')
+    return ModelJSONResponse(result)
+
+@app.post(
+    '/analyze/batch', response_model=BatchAnalyzeResponse, dependencies=[Depends(classify(request_class.BULK))]
+)
+async def analyze_batch_endpoint(
+    request: BatchAnalyzeRequest,
+    cache_control: str | None = Header(None),
+    x_request_timeout: int | None = Header(None, gt=0),
+):
+    # X-Request-Timeout is a per-item budget, started when the item gets a concurrency slot.
+    outcomes = await analyze_batch(
+        request.items,
+        request.concurrency,
+        use_cache=uses_cache(cache_control),
+        timeout=request_timeout(x_request_timeout),
+    )
+    results = []
+    for index, (item, outcome) in enumerate(zip(request.items, outcomes)):
+        if isinstance(outcome, BaseException):
+            error = BatchItemError(**error_entry(outcome))
+            entry = BatchItemResult(index=index, document_id=item.document_id, error=error)
+        else:
+            entry = BatchItemResult(index=index, document_id=item.document_id, result=outcome)
+        results.append(entry)
+    return ModelJSONResponse(BatchAnalyzeResponse(results=results))
+
+@app.post(
+    '/analyze/stream', response_class=NDJSONStreamingResponse, dependencies=[Depends(classify(request_class.BULK))]
+)
+async def analyze_stream(
+    request: Request,
+    cache_control: str | None = Header(None),
+    x_request_timeout: int | None = Header(None, gt=0),
+):
+    # Body: one AnalyzeRequest JSON object per line. Response: one line per record, in completion order;
+    # successes are AnalyzeResponse objects, failures are {'index', 'error'} with the input line index.
+    use_cache = uses_cache(cache_control)
+
+    async def analyze_line(numbered: tuple[int, bytes | None]) -> bytes:
+        index, line = numbered
+        if line is None:
+            record = {'index': index, 'error': {'code': 'INVALID_REQUEST', 'message': 'line exceeds STREAM_MAX_LINE_BYTES'}}
+            return json.dumps(record).encode() + b'\n'
+        try:
+            item = AnalyzeRequest.model_validate_json(line)
+        except ValidationError as error:
+            record = {'index': index, 'error': {'code': 'INVALID_REQUEST', 'message': validation_message(error)}}
+            return json.dumps(record).encode() + b'\n'
+        try:
+            # X-Request-Timeout is a per-record budget here, not one for the whole stream.
+            result = await analyze_document(item, use_cache, request_deadline(x_request_timeout))
+            return result.__pydantic_serializer__.to_json(result) + b'\n'
+        except Exception as error:
+            record = {'index': index, 'document_id': item.document_id, 'error': error_entry(error)}
+        return json.dumps(record).encode() + b'\n'
+
+    lines = iter_ndjson(request.stream(), config.STREAM_MAX_LINE_BYTES)
+    return NDJSONStreamingResponse(map_unordered(lines, analyze_line, config.STREAM_CONCURRENCY))
+
+@app.post('/score', response_model=ScoreResponse)
+async def score(request: ScoreRequest):
+    # Local TF-IDF score and tags for every item in one vectorized pass; no provider call, no cache.
+    try:
+        scored = await ai_service.score_documents(request.items)
+    except AnalysisError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message)
+    results = [ScoreResult(document_id=item.document_id, **entry) for item, entry in zip(request.items, scored)]
+    return ModelJSONResponse(ScoreResponse(results=results))
+
+@app.post('/jobs', status_code=status.HTTP_202_ACCEPTED, response_model=JobStatusResponse)
+async def submit_job(request: AnalyzeRequest):
+    try:
+        job_id = await job_runner.queue.submit(request.model_dump())
+    except AnalysisError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message)
+    return await job_status(job_id)
+
+@app.get('/jobs/{job_id}', response_model=JobStatusResponse)
+async def job_status(job_id: str):
+    job = await job_runner.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+        'error': job['error'],
+    }
+
+@app.get('/jobs/{job_id}/result', response_model=AnalyzeResponse)
+async def job_result(job_id: str):
+    job = await job_runner.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    if job['status'] == FAILED:
+        return JSONResponse(status_code=status.HTTP_502_BAD_GATEWAY, content=job['error'])
+    if job['status'] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job['result']
+
+@app.get('/cache/stats')
+async def cache_stats():
+    return result_cache.stats()
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics_endpoint():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(status_code=exc.status_code, content={'code': 'AI_SERVICE_ERROR', 'message': exc.detail})
+    return JSONResponse(status_code=exc.status_code, content={'code': error_code(exc.status_code), 'message': exc.detail})
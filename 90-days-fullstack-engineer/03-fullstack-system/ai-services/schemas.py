@@ -1,9 +1,11 @@
 from pydantic import BaseModel, Field
+import config
 
 class AnalyzeRequest(BaseModel):
     document_id: int = Field(..., gt=0)
     title: str = Field(..., min_length=5)
-    content: str = Field(..., min_length=50)
+    # Raw bound checked before any work; the exact CONTENT_MAX_CHARS limit (413) applies after normalization.
+    content: str = Field(..., min_length=50, max_length=config.CONTENT_RAW_MAX_CHARS)
 
 class AnalyzeResponse(BaseModel):
     document_id: int
@@ -11,3 +13,38 @@ class AnalyzeResponse(BaseModel):
     score: float
     tags: list[str]
     warnings: list[str] = []
+
+class BatchAnalyzeRequest(BaseModel):
+    items: list[AnalyzeRequest] = Field(..., min_length=1, max_length=config.BATCH_MAX_ITEMS)
+    concurrency: int = Field(config.BATCH_CONCURRENCY, gt=0, le=config.BATCH_CONCURRENCY)
+
+class BatchItemError(BaseModel):
+    code: str
+    message: str
+
+class BatchItemResult(BaseModel):
+    index: int
+    document_id: int
+    result: AnalyzeResponse | None = None
+    error: BatchItemError | None = None
+
+class BatchAnalyzeResponse(BaseModel):
+    results: list[BatchItemResult]
+
+class ScoreRequest(BaseModel):
+    items: list[AnalyzeRequest] = Field(..., min_length=1, max_length=config.SCORE_MAX_ITEMS)
+
+class ScoreResult(BaseModel):
+    document_id: int
+    score: float
+    tags: list[str]
+
+class ScoreResponse(BaseModel):
+    results: list[ScoreResult]
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    error: BatchItemError | None = None
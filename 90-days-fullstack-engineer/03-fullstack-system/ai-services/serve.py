@@ -0,0 +1,46 @@
+# Multi-process launcher: `python serve.py` runs WEB_CONCURRENCY uvicorn workers (default: one per CPU).
+import os
+import shutil
+import tempfile
+import uvicorn
+from services.cpus import available_cpus
+
+def main() -> None:
+    workers = int(os.getenv('WEB_CONCURRENCY') or available_cpus())
+    # Workers inherit the environment, so they see the same worker count and shared state settings.
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+    metrics_dir = None
+    if workers > 1:
+        # Per-process state would diverge between workers, so shared backends are the default here.
+        os.environ.setdefault('RESULT_CACHE_L2', 'sqlite')
+        os.environ.setdefault('SHARED_STORE', 'sqlite')
+        os.environ.setdefault('JOB_BACKEND', 'sqlite')
+        if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+            metrics_dir = tempfile.mkdtemp(prefix='ai-service-metrics-')
+            os.environ['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+    recover_jobs()
+    try:
+        uvicorn.run(
+            'main:app',
+            host=os.getenv('HOST', '0.0.0.0'),
+            port=int(os.getenv('PORT', '8000')),
+            workers=workers,
+        )
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+def recover_jobs() -> None:
+    # Requeue jobs left running by the previous run once, here, rather than in every worker as it starts,
+    # which would requeue jobs another worker is already running.
+    import config
+    from services.jobs import SqliteJobQueue
+
+    if config.JOB_BACKEND == 'sqlite' and config.JOB_RECOVER_RUNNING:
+        SqliteJobQueue(
+            config.JOB_SQLITE_PATH, config.JOB_MAX_PENDING, config.JOB_RETENTION_SECONDS, config.JOB_POLL_INTERVAL_SECONDS
+        ).recover()
+    os.environ['JOB_RECOVER_RUNNING'] = '0'
+
+if __name__ == '__main__':
+    main()
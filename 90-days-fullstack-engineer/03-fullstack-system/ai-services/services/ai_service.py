@@ -1,43 +1,382 @@
 import asyncio
-from pydantic import BaseModel
+import time
+import config
+from schemas import AnalyzeRequest, AnalyzeResponse
+from services.batcher import MicroBatcher
+from services.cache import REVALIDATE, ResultCache, SharedResultCache, TieredCache, content_key
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.cpu_pool import CpuPool
+from services.errors import AnalysisError, DeadlineExceededError, DocumentTooLargeError, OverloadedError
+from services.limiter import AdaptiveLimiter, Lane, LimitExceededError, QueueDeadlineError
+from services.local_scorer import LocalScorer, lead_summary, load_idf, vectorize
+from services.metrics import CACHE_LOOKUP_SECONDS, LANE_QUEUE_SECONDS, MODEL_CALLS, STAGE_SECONDS
+from services.preprocess import estimate_tokens, merge_results, normalize_document, split_chunks
+from services.provider import HttpModelProvider, ModelProvider, PlaceholderProvider, ProviderRateLimitedError
+from services.request_class import BULK, INTERACTIVE, current_class
+from services.retry import RetryPolicy, TokenBucket
+from services.similarity import SimHashIndex, sketch
+from services.simulated_provider import SimulatedProvider
+from services.singleflight import SingleFlight
+from services.store import create_store
 
-class AnalysisError(Exception):
-    def __init__(self, message: str):
-        super().__init__(message)
-        self.message = message
+cpu_pool = CpuPool(
+    workers=config.CPU_POOL_WORKERS,
+    max_pending=config.CPU_POOL_MAX_PENDING,
+    inline_below=config.CPU_POOL_INLINE_BELOW_CHARS,
+    shared_memory_above=config.CPU_POOL_SHARED_MEMORY_ABOVE_CHARS,
+)
+shared_store = create_store(config.SHARED_STORE, config.SHARED_STORE_PATH, config.REDIS_URL)
+result_store = create_store(
+    config.RESULT_CACHE_L2, config.RESULT_CACHE_L2_PATH, config.REDIS_URL
+) if config.RESULT_CACHE_L2 != 'off' else None
+result_cache = TieredCache(
+    ResultCache(config.RESULT_CACHE_MAX_BYTES, config.RESULT_CACHE_TTL_SECONDS),
+    SharedResultCache(
+        result_store,
+        config.RESULT_CACHE_L2_TTL_SECONDS,
+        config.RESULT_CACHE_STALE_WHILE_REVALIDATE_SECONDS + config.RESULT_CACHE_STALE_IF_ERROR_SECONDS,
+    ) if result_store is not None else None,
+    stale_while_revalidate=config.RESULT_CACHE_STALE_WHILE_REVALIDATE_SECONDS,
+    write_queue_max=config.RESULT_CACHE_WRITE_QUEUE_MAX,
+)
+model_calls = SingleFlight()
+local_scorer = LocalScorer(
+    config.LOCAL_SCORER_FEATURES,
+    config.LOCAL_SCORER_MAX_TAGS,
+    config.LOCAL_SCORER_TITLE_WEIGHT,
+    load_idf(config.LOCAL_SCORER_IDF_PATH, config.LOCAL_SCORER_FEATURES),
+)
+similar_documents = SimHashIndex(
+    config.SIMILARITY_MAX_DISTANCE,
+    config.SIMILARITY_INDEX_MAX_ENTRIES if config.NEAR_DUPLICATES else 0,
+    config.SIMILARITY_MIN_JACCARD,
+)
+circuit_breaker = CircuitBreaker(
+    window_size=config.BREAKER_WINDOW_SIZE,
+    min_calls=config.BREAKER_MIN_CALLS,
+    failure_rate=config.BREAKER_FAILURE_RATE,
+    cooldown_seconds=config.BREAKER_COOLDOWN_SECONDS,
+    half_open_max_calls=config.BREAKER_HALF_OPEN_MAX_CALLS,
+    # Neither shedding our own load nor provider throttling means the provider is down.
+    ignore=(LimitExceededError, ProviderRateLimitedError),
+    store=shared_store if config.SHARED_STORE != 'memory' else None,
+)
 
-class AnalyzeRequest(BaseModel):
-    document_id: int
-    title: str
-    content: str
+def per_worker(total: int) -> int:
+    # Each worker process has its own limiter, so host-wide limits are split across them.
+    return max(1, total // config.WEB_CONCURRENCY)
+
+model_limiter = AdaptiveLimiter(
+    initial_limit=per_worker(config.MODEL_CONCURRENCY_INITIAL),
+    min_limit=per_worker(config.MODEL_CONCURRENCY_MIN),
+    max_limit=per_worker(config.MODEL_CONCURRENCY_MAX),
+    latency_target=config.MODEL_LATENCY_TARGET_SECONDS,
+    backoff_ratio=config.MODEL_CONCURRENCY_BACKOFF_RATIO,
+    lanes={
+        INTERACTIVE: Lane(
+            config.LANE_INTERACTIVE_WEIGHT,
+            1.0,
+            per_worker(config.MODEL_QUEUE_MAX),
+            config.MODEL_QUEUE_TIMEOUT_SECONDS,
+        ),
+        BULK: Lane(
+            config.LANE_BULK_WEIGHT,
+            config.LANE_BULK_MAX_SHARE,
+            per_worker(config.LANE_BULK_QUEUE_MAX),
+            config.LANE_BULK_QUEUE_TIMEOUT_SECONDS,
+        ),
+    },
+)
+retry_policy = RetryPolicy(
+    max_attempts=config.RETRY_MAX_ATTEMPTS,
+    base_delay=config.RETRY_BASE_DELAY_SECONDS,
+    max_delay=config.RETRY_MAX_DELAY_SECONDS,
+    timeout=config.RETRY_TIMEOUT_SECONDS,
+    # The budget is service-wide, so each worker process gets its share.
+    budget=TokenBucket(
+        config.RETRY_BUDGET_CAPACITY / config.WEB_CONCURRENCY,
+        config.RETRY_BUDGET_REFILL_PER_SECOND / config.WEB_CONCURRENCY,
+    ),
+    retryable=lambda exc: not isinstance(exc, (CircuitOpenError, LimitExceededError)),
+    on_backoff=STAGE_SECONDS.labels('retry_sleep').observe,
+    retry_after=lambda exc: getattr(exc, 'retry_after', None),
+)
+
+def create_model_provider() -> ModelProvider:
+    if config.MODEL_PROVIDER == 'http':
+        return HttpModelProvider(
+            base_url=config.MODEL_PROVIDER_URL,
+            api_key=config.MODEL_API_KEY,
+            max_connections=config.MODEL_MAX_CONNECTIONS,
+            max_keepalive_connections=config.MODEL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.MODEL_KEEPALIVE_EXPIRY_SECONDS,
+            timeout=config.MODEL_HTTP_TIMEOUT_SECONDS,
+        )
+    if config.MODEL_PROVIDER == 'simulated':
+        return SimulatedProvider(
+            seed=config.SIM_SEED,
+            latency=config.SIM_LATENCY,
+            latency_ms=config.SIM_LATENCY_MS,
+            latency_sigma=config.SIM_LATENCY_SIGMA,
+            slow_latency_ms=config.SIM_SLOW_LATENCY_MS,
+            slow_fraction=config.SIM_SLOW_FRACTION,
+            failure_rate=config.SIM_FAILURE_RATE,
+            burst_rate=config.SIM_BURST_RATE,
+            burst_length=config.SIM_BURST_LENGTH,
+            timeout_rate=config.SIM_TIMEOUT_RATE,
+            timeout_seconds=config.SIM_TIMEOUT_SECONDS,
+            rate_limit_rps=config.SIM_RATE_LIMIT_RPS,
+        )
+    if config.MODEL_PROVIDER == 'placeholder':
+        return PlaceholderProvider()
+    raise ValueError(f'unknown MODEL_PROVIDER: {config.MODEL_PROVIDER}')
+
+model_provider = create_model_provider()
+
+async def startup() -> None:
+    await cpu_pool.start()
+    await shared_store.start()
+    if result_store is not None:
+        await result_store.start()
+    await result_cache.start()
+    await model_provider.start()
+
+async def shutdown() -> None:
+    await model_provider.close()
+    await result_cache.close()
+    if result_store is not None:
+        await result_store.close()
+    await shared_store.close()
+    await cpu_pool.close()
+
+async def call_model_batch(requests: list[AnalyzeRequest]) -> list[dict]:
+    return await model_provider.analyze_batch(requests)
+
+model_batcher = MicroBatcher(
+    call_model_batch,
+    max_batch_size=config.MODEL_BATCH_MAX_SIZE,
+    max_wait=config.MODEL_BATCH_MAX_WAIT_MS / 1000,
+) if config.MODEL_BATCH_MAX_SIZE > 1 else None
 
 async def call_external_model(request: AnalyzeRequest) -> dict:
-    # Example placeholder for an LLM call.
-    # Replace with actual model integration and auth via environment variables.
-    await asyncio.sleep(0.3)
-    return {
-        'summary': f'Analysis for document {request.document_id}',
-        'score': 0.85,
-        'tags': ['priority', 'summary'],
-    }
-
-async def analyze_document(payload: BaseModel) -> dict:
-    request = AnalyzeRequest(**payload.dict())
-    attempts = 0
-    while attempts < 3:
+    if model_batcher is not None:
+        return await model_batcher.submit(request)
+    return await model_provider.analyze(request)
+
+def build_response(request: AnalyzeRequest, response: dict, warnings: list[str] | None = None) -> AnalyzeResponse:
+    # The one place the response model is validated; the API layer serializes it without re-validating.
+    return AnalyzeResponse(
+        document_id=request.document_id,
+        summary=response['summary'],
+        score=response['score'],
+        tags=response['tags'],
+        warnings=warnings or [],
+    )
+
+async def score_documents(requests: list[AnalyzeRequest]) -> list[dict]:
+    # Local {'score', 'tags'} per request, in order, without calling the provider. Tokenizing runs in the
+    # CPU pool; the vectorized TF-IDF step runs here.
+    with STAGE_SECONDS.labels('local_score').time():
+        documents = [(request.title, request.content) for request in requests]
+        vectors = await cpu_pool.run(
+            vectorize,
+            documents,
+            local_scorer.title_weight,
+            local_scorer.n_features,
+            cost=sum(len(title) + len(content) for title, content in documents),
+        )
+        return local_scorer.score(vectors)
+
+async def local_analysis(request: AnalyzeRequest) -> dict:
+    (scored,) = await score_documents([request])
+    return {'summary': lead_summary(request.content, config.LOCAL_SUMMARY_MAX_CHARS), **scored}
+
+def default_deadline() -> float:
+    return time.monotonic() + config.REQUEST_TIMEOUT_MS / 1000
+
+def shared_deadline() -> float:
+    # A coalesced call serves callers with different deadlines, so it runs against the server maximum;
+    # each caller stops waiting at its own deadline, and the call is cancelled once none is left.
+    return time.monotonic() + config.REQUEST_MAX_TIMEOUT_MS / 1000
+
+async def call_with_retries(request: AnalyzeRequest, deadline: float) -> dict:
+    async def attempt() -> dict:
+        # Inside the breaker, so a provider that hangs until the deadline counts as a failure.
+        # A coalesced call runs in the lane of the request that started it: an interactive request that
+        # joins a call a bulk request started waits in the bulk queue, bounded by its own deadline.
+        lane = current_class.get()
+        queued = time.perf_counter()
+        async with model_limiter.slot(max(deadline - time.monotonic(), 0), lane):
+            started = time.perf_counter()
+            STAGE_SECONDS.labels('model_queue').observe(started - queued)
+            LANE_QUEUE_SECONDS.labels(lane).observe(started - queued)
+            outcome = 'error'
+            try:
+                response = await asyncio.wait_for(call_external_model(request), max(deadline - time.monotonic(), 0))
+                outcome = 'success'
+                return response
+            except asyncio.TimeoutError:
+                outcome = 'timeout'
+                raise
+            finally:
+                STAGE_SECONDS.labels('model_call').observe(time.perf_counter() - started)
+                MODEL_CALLS.labels(outcome).inc()
+
+    try:
+        return await retry_policy.run(lambda: circuit_breaker.call(attempt), deadline)
+    except CircuitOpenError:
+        raise AnalysisError('AI provider unavailable')
+    except QueueDeadlineError:
+        raise DeadlineExceededError('AI provider did not respond before the request deadline')
+    except LimitExceededError:
+        raise OverloadedError('AI service is at capacity, retry later')
+    except Exception:
+        if time.monotonic() >= deadline:
+            raise DeadlineExceededError('AI provider did not respond before the request deadline')
+        raise AnalysisError('AI provider failed after retries')
+
+async def preprocess(request: AnalyzeRequest) -> AnalyzeRequest:
+    # Normalized title and content; the validated request itself is reused when nothing changed.
+    with STAGE_SECONDS.labels('preprocess').time():
+        title, content = await cpu_pool.run(
+            normalize_document, request.title, request.content, cost=len(request.content)
+        )
+    if len(content) > config.CONTENT_MAX_CHARS:
+        raise DocumentTooLargeError(f'content exceeds {config.CONTENT_MAX_CHARS} characters after normalization')
+    if title == request.title and content == request.content:
+        return request
+    return request.model_copy(update={'title': title, 'content': content})
+
+async def analyze_content(request: AnalyzeRequest, deadline: float) -> dict:
+    # Long documents go to the model as token-budgeted chunks, analyzed concurrently and merged.
+    if estimate_tokens(request.content) <= config.CHUNK_MAX_TOKENS:
+        return await call_with_retries(request, deadline)
+    chunks = split_chunks(request.content, config.CHUNK_MAX_TOKENS)
+    semaphore = asyncio.Semaphore(config.CHUNK_CONCURRENCY)
+
+    async def run(chunk: str) -> dict:
+        async with semaphore:
+            return await call_with_retries(request.model_copy(update={'content': chunk}), deadline)
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        # One failed chunk fails the document, so the rest need not finish.
+        for task in tasks:
+            task.cancel()
+    return merge_results(results, [len(chunk) for chunk in chunks])
+
+async def analyze_document(
+    request: AnalyzeRequest, use_cache: bool = True, deadline: float | None = None
+) -> AnalyzeResponse:
+    # `request` is the model FastAPI already validated; it is used as is, not re-validated or copied.
+    with STAGE_SECONDS.labels('analyze_document').time():
+        return await _analyze_document(request, use_cache, deadline)
+
+async def cached_result(key: str) -> tuple[dict | None, str]:
+    started = time.perf_counter()
+    cached, result = await result_cache.get(key)
+    CACHE_LOOKUP_SECONDS.labels(result).observe(time.perf_counter() - started)
+    return cached, result
+
+async def fallback_result(key: str) -> dict | None:
+    started = time.perf_counter()
+    cached = await result_cache.get_stale(key)
+    CACHE_LOOKUP_SECONDS.labels('miss' if cached is None else 'fallback').observe(time.perf_counter() - started)
+    return cached
+
+async def fingerprint(request: AnalyzeRequest) -> tuple[int, bytes, bytes] | None:
+    if similar_documents.max_entries <= 0:
+        return None
+    with STAGE_SECONDS.labels('similarity').time():
+        return await cpu_pool.run(sketch, f'{request.title}\n{request.content}', cost=len(request.content))
+
+async def near_duplicate_result(key: str, document_fingerprint: tuple[int, bytes, bytes]) -> dict | None:
+    # The fresh cached analysis of a confirmed near-duplicate in the index, if any.
+    started = time.perf_counter()
+    match = similar_documents.find(document_fingerprint)
+    if match is None or match == key:
+        return None
+    cached, result = await result_cache.get(match)
+    if cached is None or result == REVALIDATE:
+        # Its analysis is gone or going stale; drop it so later lookups find a live one.
+        similar_documents.remove(match)
+        return None
+    CACHE_LOOKUP_SECONDS.labels('near_duplicate').observe(time.perf_counter() - started)
+    return cached
+
+_revalidations: set[asyncio.Task] = set()
+
+def revalidate(request: AnalyzeRequest, key: str) -> None:
+    async def refresh() -> None:
+        # Background work, whoever triggered it.
+        current_class.set(BULK)
+        try:
+            response = await model_calls.do(key, lambda: analyze_content(request, shared_deadline()))
+        except Exception:
+            # The stale entry keeps being served until it ages out of the revalidation window.
+            return
+        result_cache.set(key, response)
+
+    task = asyncio.ensure_future(refresh())
+    _revalidations.add(task)
+    task.add_done_callback(_revalidations.discard)
+
+async def _analyze_document(request: AnalyzeRequest, use_cache: bool, deadline: float | None) -> AnalyzeResponse:
+    deadline = deadline or default_deadline()
+    request = await preprocess(request)
+    key = content_key(request.title, request.content)
+    if use_cache:
+        cached, result = await cached_result(key)
+        if result == REVALIDATE:
+            # Stale-while-revalidate: answer now and refresh the entry off the request path.
+            revalidate(request, key)
+        if cached is not None:
+            return build_response(request, cached)
+    document_fingerprint = await fingerprint(request)
+    if use_cache and document_fingerprint is not None:
+        near = await near_duplicate_result(key, document_fingerprint)
+        if near is not None:
+            warning = 'near-duplicate of a previously analyzed document; reusing its analysis'
+            return build_response(request, near, [warning])
+
+    # Concurrent requests for the same content share one model call and its outcome.
+    try:
         try:
-            response = await call_external_model(request)
-            return {
-                'document_id': request.document_id,
-                'summary': response['summary'],
-                'score': response['score'],
-                'tags': response['tags'],
-                'warnings': []
-            }
-        except Exception as exc:
-            attempts += 1
-            if attempts >= 3:
-                raise AnalysisError('AI provider failed after retries')
-            await asyncio.sleep(2 ** attempts)
-
-    raise AnalysisError('AI service unreachable')
+            shared = model_calls.do(key, lambda: analyze_content(request, shared_deadline()))
+            response = await asyncio.wait_for(shared, max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError('AI provider did not respond before the request deadline')
+    except AnalysisError as error:
+        # An expired deadline stays a 504, with no degraded answer of any kind.
+        if isinstance(error, DeadlineExceededError):
+            raise
+        # Cache-Control: no-cache rules out cached answers, fresh or stale.
+        stale = await fallback_result(key) if use_cache else None
+        if stale is not None:
+            return build_response(request, stale, [f'{error.message}; returning a previously cached analysis'])
+        # Load shedding stays visible to the caller (429); other failures get a degraded local answer.
+        if not config.LOCAL_FALLBACK or isinstance(error, OverloadedError):
+            raise
+        local = await local_analysis(request)
+        return build_response(request, local, [f'{error.message}; returning a local analysis'])
+    result_cache.set(key, response)
+    if document_fingerprint is not None:
+        similar_documents.add(document_fingerprint, key)
+    return build_response(request, response)
+
+async def analyze_batch(
+    requests: list[AnalyzeRequest], concurrency: int, use_cache: bool = True, timeout: float | None = None
+) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(request: AnalyzeRequest):
+        async with semaphore:
+            # Each item's budget starts once it gets a slot, so items queued behind the concurrency cap
+            # do not spend it waiting (as with /analyze/stream records).
+            deadline = time.monotonic() + timeout if timeout is not None else default_deadline()
+            return await analyze_document(request, use_cache, deadline)
+
+    # Failures are returned in place so one bad item does not sink the batch.
+    return await asyncio.gather(*(run(request) for request in requests), return_exceptions=True)
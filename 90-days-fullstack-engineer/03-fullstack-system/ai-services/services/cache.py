@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+def content_key(title: str, content: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(title.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(content.encode('utf-8'))
+    return digest.hexdigest()
+
+class ResultCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, tuple[float, int, dict]] = OrderedDict()
+
+    def lookup(self, key: str) -> tuple[dict, float] | None:
+        # The value and seconds until it expires (negative once expired). Expired entries stay until
+        # evicted so they can still serve as a fallback.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[2], entry[0] - time.monotonic()
+
+    def set(self, key: str, value: dict, ttl: float | None = None) -> None:
+        size = len(key) + len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + (self.ttl_seconds if ttl is None else ttl), size, value)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'bytes': self.size_bytes}
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+class SharedResultCache:
+    # Result cache kept in a key-value store (services/store.py), so entries outlive the process and are
+    # seen by every worker sharing the store. Entries are retained `retain_seconds` past their expiry.
+    def __init__(self, store, ttl_seconds: float, retain_seconds: float):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.retain_seconds = retain_seconds
+
+    async def lookup(self, key: str) -> tuple[dict, float] | None:
+        raw = await self.store.get(f'result:{key}')
+        if raw is None:
+            return None
+        expires_at, value = json.loads(raw)
+        # Wall-clock time, since the expiry is compared across processes and restarts.
+        return value, expires_at - time.time()
+
+    async def set(self, key: str, value: dict) -> None:
+        raw = json.dumps([time.time() + self.ttl_seconds, value]).encode()
+        await self.store.set(f'result:{key}', raw, self.ttl_seconds + self.retain_seconds)
+
+HIT = 'hit'
+L2_HIT = 'l2_hit'
+REVALIDATE = 'revalidate'
+MISS = 'miss'
+
+class TieredCache:
+    # L1 is the in-process LRU, L2 an optional SharedResultCache. Reads go through L1 to L2 and promote L2
+    # hits; writes land in L1 at once and reach L2 through a bounded write-behind queue, so a slow or
+    # unavailable store never adds latency to a request.
+    def __init__(
+        self,
+        l1: ResultCache,
+        l2: SharedResultCache | None = None,
+        stale_while_revalidate: float = 0,
+        write_queue_max: int = 1000,
+    ):
+        self.l1 = l1
+        self.l2 = l2
+        self.stale_while_revalidate = stale_while_revalidate
+        self.counts = {HIT: 0, L2_HIT: 0, REVALIDATE: 0, MISS: 0}
+        self.write_errors = 0
+        self.dropped_writes = 0
+        self.write_queue_max = write_queue_max
+        self._writes: asyncio.Queue[tuple[str, dict]] | None = None
+        self._writer: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        # The queue binds to the loop that first waits on it, so each start (a restarted app runs on a new
+        # loop) gets its own.
+        if self.l2 is not None:
+            self._writes = asyncio.Queue(self.write_queue_max)
+            self._writer = asyncio.create_task(self._write_behind())
+
+    async def close(self) -> None:
+        # Flush pending writes so the next start is warm.
+        if self._writer is not None:
+            await self._writes.join()
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+            self._writes = None
+
+    async def get(self, key: str) -> tuple[dict | None, str]:
+        # Returns the value and HIT, L2_HIT, REVALIDATE (expired less than `stale_while_revalidate` ago;
+        # serve it and refresh in the background) or MISS.
+        candidates = []
+        local = self.l1.lookup(key)
+        if local is not None:
+            if local[1] > 0:
+                return self._count(local[0], HIT)
+            candidates.append(local)
+        remote = await self._l2_lookup(key)
+        if remote is not None:
+            if remote[1] > 0:
+                self.l1.set(key, remote[0], min(self.l1.ttl_seconds, remote[1]))
+                return self._count(remote[0], L2_HIT)
+            candidates.append(remote)
+        if candidates:
+            value, expires_in = max(candidates, key=lambda candidate: candidate[1])
+            if -expires_in <= self.stale_while_revalidate:
+                return self._count(value, REVALIDATE)
+        return self._count(None, MISS)
+
+    async def get_stale(self, key: str) -> dict | None:
+        # Any retained entry, however old; the fallback while the provider is failing.
+        local = self.l1.lookup(key)
+        if local is not None:
+            return local[0]
+        remote = await self._l2_lookup(key)
+        return remote[0] if remote is not None else None
+
+    def set(self, key: str, value: dict) -> None:
+        self.l1.set(key, value)
+        if self._writer is None:
+            return
+        try:
+            self._writes.put_nowait((key, value))
+        except asyncio.QueueFull:
+            self.dropped_writes += 1
+
+    def stats(self) -> dict:
+        return {
+            **self.l1.stats(),
+            'hits': self.counts[HIT],
+            'l2_hits': self.counts[L2_HIT],
+            'stale_hits': self.counts[REVALIDATE],
+            'misses': self.counts[MISS],
+            'l2_pending_writes': self._writes.qsize() if self._writes is not None else 0,
+            'l2_dropped_writes': self.dropped_writes,
+            'l2_write_errors': self.write_errors,
+        }
+
+    def _count(self, value: dict | None, result: str) -> tuple[dict | None, str]:
+        self.counts[result] += 1
+        return value, result
+
+    async def _l2_lookup(self, key: str) -> tuple[dict, float] | None:
+        if self.l2 is None:
+            return None
+        try:
+            return await self.l2.lookup(key)
+        except Exception:
+            # An unreachable L2 degrades to an L1-only cache.
+            return None
+
+    async def _write_behind(self) -> None:
+        while True:
+            key, value = await self._writes.get()
+            try:
+                await self.l2.set(key, value)
+            except Exception:
+                self.write_errors += 1
+            finally:
+                self._writes.task_done()
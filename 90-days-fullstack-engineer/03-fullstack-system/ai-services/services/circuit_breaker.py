@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window_size: int,
+        min_calls: int,
+        failure_rate: float,
+        cooldown_seconds: float,
+        half_open_max_calls: int = 1,
+        ignore: tuple[type[BaseException], ...] = (),
+        store=None,
+        name: str = 'model',
+        sync_interval: float = 1.0,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_max_calls = half_open_max_calls
+        # Errors that say nothing about provider health (e.g. local load shedding).
+        self.ignore = ignore
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # With a shared store, a breaker that opens publishes its open-until time and the other worker
+        # processes pick it up on their next sync, so one process seeing the outage opens them all.
+        self.store = store
+        self.key = f'circuit:{name}'
+        self.sync_interval = sync_interval
+        self._synced_at = float('-inf')
+        self._publishing: set[asyncio.Task] = set()
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    async def call(self, operation: Callable[..., Awaitable], *args):
+        if self.store is not None and time.monotonic() - self._synced_at >= self.sync_interval:
+            await self._sync()
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_max_calls):
+            raise CircuitOpenError('circuit open')
+        probing = state == HALF_OPEN
+        if probing:
+            self._probes += 1
+        try:
+            result = await operation(*args)
+        except Exception as exc:
+            if isinstance(exc, self.ignore):
+                self._release(probing)
+            else:
+                self._record(False, probing)
+            raise
+        except BaseException:
+            # Cancellation is the caller giving up, not the provider failing.
+            self._release(probing)
+            raise
+        self._record(True, probing)
+        return result
+
+    async def _sync(self) -> None:
+        self._synced_at = time.monotonic()
+        try:
+            raw = await self.store.get(self.key)
+        except Exception:
+            # The shared state is advisory; an unreachable store leaves this process on its own breaker.
+            return
+        if raw is None or self._state != CLOSED:
+            return
+        remaining = float(raw) - time.time()
+        if remaining > 0:
+            self._state = OPEN
+            self._opened_at = time.monotonic() - (self.cooldown_seconds - remaining)
+            self._outcomes.clear()
+
+    def _release(self, probing: bool) -> None:
+        if probing:
+            self._probes = max(0, self._probes - 1)
+
+    def _record(self, success: bool, probing: bool) -> None:
+        if probing:
+            self._release(probing)
+            if self._state != HALF_OPEN:
+                return
+            if success:
+                self._state = CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        if self._state != CLOSED:
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        if self.store is not None:
+            until = str(time.time() + self.cooldown_seconds).encode()
+            task = asyncio.ensure_future(self.store.set(self.key, until, self.cooldown_seconds))
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Callable
+from services.errors import AnalysisError, OverloadedError
+
+def _run_shared(name: str, size: int):
+    # Worker side of a shared-memory hand-off: the pickled (function, args) is read straight from the block.
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        function, args = pickle.loads(block.buf[:size])
+    finally:
+        block.close()
+    return function(*args)
+
+class CpuPool:
+    # Runs CPU-bound steps in worker processes so they do not stall the event loop. Calls whose `cost`
+    # (roughly, characters of text) is under `inline_below` run inline, where the hand-off would cost
+    # more than the work, and those from `shared_memory_above` up hand their arguments over through
+    # shared memory. With workers=0 everything runs inline.
+    def __init__(self, workers: int, max_pending: int, inline_below: int, shared_memory_above: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.inline_below = inline_below
+        self.shared_memory_above = shared_memory_above
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def start(self) -> None:
+        if self.workers > 0:
+            self._executor = self._create_executor()
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def run(self, function: Callable, *args, cost: int = 0):
+        # `function` must be importable at module level, since it is pickled by reference.
+        if self._executor is None or cost < self.inline_below:
+            return function(*args)
+        if self.pending >= self.max_pending:
+            raise OverloadedError('CPU worker pool is at capacity, retry later')
+        self.pending += 1
+        try:
+            return await self._submit(function, args, cost)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool for the calls that follow.
+            self._executor = self._create_executor()
+            raise AnalysisError('CPU worker process failed')
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {'workers': self.workers, 'pending': self.pending, 'max_pending': self.max_pending}
+
+    async def _submit(self, function: Callable, args: tuple, cost: int):
+        loop = asyncio.get_running_loop()
+        if cost < self.shared_memory_above:
+            return await loop.run_in_executor(self._executor, function, *args)
+        # Large payloads go through one shared-memory block instead of being streamed through the pipe.
+        payload = pickle.dumps((function, args), protocol=pickle.HIGHEST_PROTOCOL)
+        block = shared_memory.SharedMemory(create=True, size=len(payload))
+        try:
+            block.buf[:len(payload)] = payload
+            return await loop.run_in_executor(self._executor, _run_shared, block.name, len(payload))
+        finally:
+            block.close()
+            block.unlink()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already runs an event loop and helper threads is not safe.
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
@@ -0,0 +1,15 @@
+class AnalysisError(Exception):
+    status_code = 503
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+class DeadlineExceededError(AnalysisError):
+    status_code = 504
+
+class OverloadedError(AnalysisError):
+    status_code = 429
+
+class DocumentTooLargeError(AnalysisError):
+    status_code = 413
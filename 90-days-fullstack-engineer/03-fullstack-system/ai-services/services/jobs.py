@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+from services.errors import OverloadedError
+
+logger = logging.getLogger('ai_service.jobs')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# Queue backends share one interface: submit / claim / complete / fail / get.
+# Records are plain dicts: id, status, payload, result, error, created_at, updated_at.
+
+class InMemoryJobQueue:
+    def __init__(self, max_pending: int, retention_seconds: float):
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._jobs: dict[str, dict] = {}
+        self._queue: asyncio.Queue[str] | None = None
+
+    async def start(self) -> None:
+        # Created here, on the loop that serves it: an asyncio.Queue binds to the first loop that uses it,
+        # and a restarted app runs on a new one. Jobs a previous run left unfinished are queued again.
+        self._queue = asyncio.Queue()
+        for job in sorted(self._jobs.values(), key=lambda job: job['created_at']):
+            if job['status'] in (QUEUED, RUNNING):
+                self._update(job, status=QUEUED)
+                self._queue.put_nowait(job['id'])
+
+    async def close(self) -> None:
+        pass
+
+    async def submit(self, payload: dict) -> str:
+        self._prune()
+        if self._queue.qsize() >= self.max_pending:
+            raise OverloadedError('job queue is full, retry later')
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            'id': job_id, 'status': QUEUED, 'payload': payload, 'result': None, 'error': None,
+            'created_at': now, 'updated_at': now,
+        }
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def claim(self) -> tuple[str, dict]:
+        while True:
+            job = self._jobs.get(await self._queue.get())
+            if job is not None:
+                self._update(job, status=RUNNING)
+                return job['id'], job['payload']
+
+    async def complete(self, job_id: str, result: dict) -> None:
+        self._update(self._jobs[job_id], status=SUCCEEDED, result=result)
+
+    async def fail(self, job_id: str, error: dict) -> None:
+        self._update(self._jobs[job_id], status=FAILED, error=error)
+
+    async def get(self, job_id: str) -> dict | None:
+        return self._jobs.get(job_id)
+
+    def _update(self, job: dict, **fields) -> None:
+        job.update(fields, updated_at=time.time())
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in (SUCCEEDED, FAILED) and job['updated_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+class SqliteJobQueue:
+    def __init__(
+        self, path: str, max_pending: int, retention_seconds: float, poll_interval: float, recover_running: bool = True
+    ):
+        self.path = path
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self.recover_running = recover_running
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.recover if self.recover_running else self._setup)
+
+    def recover(self) -> None:
+        # Jobs that were running when the service stopped are picked up again. Only safe while no process
+        # is running jobs from this file, so with several workers the launcher does it once (serve.py).
+        self._setup()
+        with self._connect() as connection:
+            connection.execute('UPDATE jobs SET status = ? WHERE status = ?', (QUEUED, RUNNING))
+
+    async def close(self) -> None:
+        pass
+
+    async def submit(self, payload: dict) -> str:
+        return await asyncio.to_thread(self._submit, payload)
+
+    async def claim(self) -> tuple[str, dict]:
+        while True:
+            claimed = await asyncio.to_thread(self._claim)
+            if claimed is not None:
+                return claimed
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, job_id: str, result: dict) -> None:
+        await asyncio.to_thread(self._finish, job_id, SUCCEEDED, 'result', result)
+
+    async def fail(self, job_id: str, error: dict) -> None:
+        await asyncio.to_thread(self._finish, job_id, FAILED, 'error', error)
+
+    async def get(self, job_id: str) -> dict | None:
+        return await asyncio.to_thread(self._get, job_id)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit mode with explicit BEGIN IMMEDIATE where several statements must be atomic.
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def _setup(self) -> None:
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, error TEXT,'
+                ' created_at REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)')
+
+    def _submit(self, payload: dict) -> str:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+                (SUCCEEDED, FAILED, now - self.retention_seconds),
+            )
+            (pending,) = connection.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', (QUEUED,)).fetchone()
+            if pending >= self.max_pending:
+                connection.execute('ROLLBACK')
+                raise OverloadedError('job queue is full, retry later')
+            connection.execute(
+                'INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, QUEUED, json.dumps(payload), now, now),
+            )
+            connection.execute('COMMIT')
+        return job_id
+
+    def _claim(self) -> tuple[str, dict] | None:
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT id, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1', (QUEUED,)
+            ).fetchone()
+            if row is None:
+                connection.execute('ROLLBACK')
+                return None
+            connection.execute(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?', (RUNNING, time.time(), row['id'])
+            )
+            connection.execute('COMMIT')
+        return row['id'], json.loads(row['payload'])
+
+    def _finish(self, job_id: str, status: str, column: str, value: dict) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                f'UPDATE jobs SET status = ?, {column} = ?, updated_at = ? WHERE id = ?',
+                (status, json.dumps(value), time.time(), job_id),
+            )
+
+    def _get(self, job_id: str) -> dict | None:
+        with self._connect() as connection:
+            row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for column in ('payload', 'result', 'error'):
+            job[column] = json.loads(job[column]) if job[column] is not None else None
+        return job
+
+class JobRunner:
+    def __init__(
+        self,
+        queue,
+        handler: Callable[[dict], Awaitable[dict]],
+        describe_error: Callable[[Exception], dict],
+        workers: int,
+        error_backoff: float = 1.0,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.describe_error = describe_error
+        self.workers = workers
+        self.error_backoff = error_backoff
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self.queue.start()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.queue.close()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                await self._run_one()
+            except Exception:
+                # A queue error (e.g. a locked or unwritable SQLite file) must not end this worker for good.
+                logger.exception('job worker failed to claim or record a job; retrying')
+                await asyncio.sleep(self.error_backoff)
+
+    async def _run_one(self) -> None:
+        job_id, payload = await self.queue.claim()
+        try:
+            result = await self.handler(payload)
+        except Exception as exc:
+            await self.queue.fail(job_id, self.describe_error(exc))
+        else:
+            await self.queue.complete(job_id, result)
+
+def create_job_queue(
+    backend: str,
+    sqlite_path: str,
+    max_pending: int,
+    retention_seconds: float,
+    poll_interval: float,
+    recover_running: bool = True,
+):
+    if backend == 'memory':
+        return InMemoryJobQueue(max_pending, retention_seconds)
+    if backend == 'sqlite':
+        return SqliteJobQueue(sqlite_path, max_pending, retention_seconds, poll_interval, recover_running)
+    raise ValueError(f'unknown job backend: {backend}')
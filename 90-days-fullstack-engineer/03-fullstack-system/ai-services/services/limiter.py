@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+class LimitExceededError(Exception):
+    pass
+
+class QueueDeadlineError(LimitExceededError):
+    # The caller's own deadline ran out while it waited for a slot, before the lane's queue timeout did.
+    pass
+
+class Lane:
+    # One request class's share of the limiter: `weight` sets its share of freed slots while several lanes
+    # wait, `max_share` caps the fraction of the limit it may hold, and its own queue bounds admission.
+    def __init__(self, weight: float, max_share: float, max_queue: int, queue_timeout: float):
+        self.weight = weight
+        self.max_share = max_share
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        # Virtual finish time of this lane's last dispatched slot, i.e. where its next one starts (weighted
+        # fair queueing).
+        self.finish = 0.0
+
+    def cap(self, limit: int) -> int:
+        if self.max_share >= 1:
+            return limit
+        # A capped lane leaves at least one slot to the others, except at limit 1, where starving it
+        # would stall it completely.
+        return max(1, min(limit - 1, int(limit * self.max_share)))
+
+DEFAULT_LANE = 'default'
+
+class AdaptiveLimiter:
+    # AIMD: +1 per window of healthy calls, multiplicative cut on errors or slow calls.
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        backoff_ratio: float = 0.9,
+        max_queue: int = 100,
+        queue_timeout: float = 1.0,
+        lanes: dict[str, Lane] | None = None,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        # Without lanes, one lane takes every call.
+        self.lanes = lanes or {DEFAULT_LANE: Lane(1, 1.0, max_queue, queue_timeout)}
+        self.default_lane = next(iter(self.lanes))
+        self._virtual_time = 0.0
+
+    @asynccontextmanager
+    async def slot(self, timeout: float | None = None, lane: str | None = None):
+        lane = lane if lane in self.lanes else self.default_lane
+        await self.acquire(timeout, lane)
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.release(success=False, lane=lane)
+            raise
+        except BaseException:
+            self.release(lane=lane)
+            raise
+        self.release(success=time.monotonic() - started <= self.latency_target, lane=lane)
+
+    async def acquire(self, timeout: float | None = None, lane: str | None = None) -> None:
+        name = lane or self.default_lane
+        lane = self.lanes[name]
+        # Every release dispatches all the waiters it can, so free capacity here means no eligible waiter.
+        if self.in_flight < int(self.limit) and not lane.waiters and lane.in_flight < lane.cap(int(self.limit)):
+            self._start(lane, max(lane.finish, self._virtual_time))
+            return
+        if len(lane.waiters) >= lane.max_queue:
+            raise LimitExceededError(f'concurrency limit reached and the {name} queue is full')
+        if not lane.waiters:
+            # A lane's place in line is fixed when it starts waiting, not re-read at every dispatch, or a lane
+            # would trail the virtual clock for as long as a heavier lane kept it moving.
+            lane.finish = max(lane.finish, self._virtual_time)
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        wait = lane.queue_timeout if timeout is None else min(timeout, lane.queue_timeout)
+        try:
+            await asyncio.wait_for(waiter, wait)
+        except BaseException as error:
+            # The slot may have been handed over in the same loop iteration as the timeout or cancellation
+            # (wait_for can time out on a completed future from 3.12); give it back rather than leak it.
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane=name)
+            if not isinstance(error, asyncio.TimeoutError):
+                raise
+            if wait < lane.queue_timeout:
+                raise QueueDeadlineError('deadline reached while waiting for a concurrency slot')
+            raise LimitExceededError('timed out waiting for a concurrency slot')
+        finally:
+            if waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+
+    def release(self, success: bool | None = None, lane: str | None = None) -> None:
+        self.in_flight -= 1
+        self.lanes[lane or self.default_lane].in_flight -= 1
+        if success is True:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif success is False:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        self._dispatch()
+
+    def waiting(self) -> dict[str, int]:
+        return {name: len(lane.waiters) for name, lane in self.lanes.items()}
+
+    def _start(self, lane: Lane, start: float) -> None:
+        self.in_flight += 1
+        lane.in_flight += 1
+        self._virtual_time = max(self._virtual_time, start)
+        lane.finish = start + 1 / lane.weight
+
+    def _dispatch(self) -> None:
+        # Freed slots go to the waiting lane with the earliest virtual finish time, among lanes under their
+        # cap, so each backlogged lane gets slots in proportion to its weight.
+        limit = int(self.limit)
+        while self.in_flight < limit:
+            eligible = [
+                lane for lane in self.lanes.values() if lane.waiters and lane.in_flight < lane.cap(limit)
+            ]
+            if not eligible:
+                return
+            lane = min(eligible, key=lambda candidate: candidate.finish + 1 / candidate.weight)
+            waiter = lane.waiters.popleft()
+            if not waiter.done():
+                self._start(lane, lane.finish)
+                waiter.set_result(None)
@@ -0,0 +1,104 @@
+import json
+import re
+import sys
+import zlib
+from collections import Counter
+import numpy as np
+
+# A network-free analyzer: TF-IDF over hashed terms, computed for a whole batch of documents with NumPy.
+# Tags are a document's highest-weighted terms and the score is the share of its TF-IDF mass they carry.
+
+_WORD = re.compile(r'[^\W\d_]{3,}')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+STOPWORDS = frozenset(
+    'about above after again against all also and any are because been before being below between both but '
+    'can could did does doing down during each few for from further had has have having her here hers him his '
+    'how into its itself just more most not now off once only other our ours out over own same she should some '
+    'such than that the their theirs them then there these they this those through too under until very was '
+    'were what when where which while who whom why will with would you your yours'.split()
+)
+
+def vectorize(documents: list[tuple[str, str]], title_weight: int, n_features: int) -> tuple:
+    # (title, content) pairs to one flat entry per distinct term per document: document index, hashed
+    # feature, count and the term itself. Pure, so it can run in a worker process.
+    doc_ids = []
+    terms = []
+    counts = []
+    for index, (title, content) in enumerate(documents):
+        document_counts = Counter(word for word in _WORD.findall(content.lower()) if word not in STOPWORDS)
+        for word in _WORD.findall(title.lower()):
+            if word not in STOPWORDS:
+                document_counts[word] += title_weight
+        doc_ids.extend([index] * len(document_counts))
+        terms.extend(document_counts)
+        counts.extend(document_counts.values())
+    # Each distinct term is hashed once per batch; crc32 rather than hash(), which is salted per process.
+    vocabulary = {term: zlib.crc32(term.encode()) % n_features for term in set(terms)}
+    return (
+        len(documents),
+        np.array(doc_ids, dtype=np.int64),
+        np.fromiter(map(vocabulary.__getitem__, terms), dtype=np.int64, count=len(terms)),
+        np.array(counts, dtype=np.float64),
+        terms,
+    )
+
+def lead_summary(content: str, max_chars: int) -> str:
+    # The opening sentences of the content, up to max_chars.
+    summary = ''
+    for sentence in _SENTENCE_END.split(content.strip()):
+        if summary and len(summary) + 1 + len(sentence) > max_chars:
+            break
+        summary = f'{summary} {sentence}' if summary else sentence
+    return summary[:max_chars]
+
+def fit_idf(vectors: tuple, n_features: int) -> np.ndarray:
+    # Smoothed IDF per hashed feature from a reference corpus.
+    n_documents, _, features, _, _ = vectors
+    # Each feature appears once per document, so counting entries counts documents.
+    document_frequency = np.bincount(features, minlength=n_features)
+    return np.log((1 + n_documents) / (1 + document_frequency)) + 1
+
+def load_idf(path: str | None, n_features: int) -> np.ndarray | None:
+    if not path:
+        return None
+    idf = np.load(path)
+    if idf.shape != (n_features,):
+        raise ValueError(f'{path} holds {idf.shape[0]} IDF weights, expected LOCAL_SCORER_FEATURES={n_features}')
+    return idf
+
+class LocalScorer:
+    # IDF is fixed when the scorer is built (fitted offline, or uniform), so the same document always
+    # gets the same score and tags.
+    def __init__(self, n_features: int, max_tags: int, title_weight: int, idf: np.ndarray | None = None):
+        self.n_features = n_features
+        self.max_tags = max_tags
+        self.title_weight = title_weight
+        self.idf = np.ones(n_features) if idf is None else idf
+
+    def score(self, vectors: tuple) -> list[dict]:
+        n_documents, doc_ids, features, counts, terms = vectors
+        weights = (1 + np.log(counts)) * self.idf[features]
+        totals = np.bincount(doc_ids, weights, minlength=n_documents)
+        # Rank terms within each document by weight and keep the top max_tags.
+        order = np.lexsort((-weights, doc_ids))
+        starts = np.searchsorted(doc_ids[order], np.arange(n_documents))
+        ranks = np.arange(len(order)) - starts[doc_ids[order]]
+        top = order[ranks < self.max_tags]
+        top_mass = np.bincount(doc_ids[top], weights[top], minlength=n_documents)
+        scores = np.divide(top_mass, totals, out=np.zeros(n_documents), where=totals > 0)
+        tags = [[] for _ in range(n_documents)]
+        for index in top.tolist():
+            tags[doc_ids[index]].append(terms[index])
+        return [{'score': round(float(score), 4), 'tags': document_tags} for score, document_tags in zip(scores, tags)]
+
+if __name__ == '__main__':
+    # python -m services.local_scorer corpus.jsonl idf.npy: fits LOCAL_SCORER_IDF_PATH from JSON lines
+    # with title and content, using the LOCAL_SCORER_* settings.
+    import config
+
+    corpus_path, idf_path = sys.argv[1:3]
+    with open(corpus_path, encoding='utf-8') as corpus:
+        items = [json.loads(line) for line in corpus if line.strip()]
+    documents = [(item['title'], item['content']) for item in items]
+    vectors = vectorize(documents, config.LOCAL_SCORER_TITLE_WEIGHT, config.LOCAL_SCORER_FEATURES)
+    np.save(idf_path, fit_idf(vectors, config.LOCAL_SCORER_FEATURES))
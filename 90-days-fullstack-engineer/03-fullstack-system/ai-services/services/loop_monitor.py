@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from services.metrics import LOOP_BLOCKS, LOOP_LAG_QUANTILE, LOOP_LAG_SECONDS
+
+logger = logging.getLogger('ai_service.loop_monitor')
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class LoopMonitor:
+    # A task on the event loop sleeps `interval` at a time; how late it wakes up is the loop lag. A watchdog
+    # thread watches that task's heartbeat and, once it is `block_threshold` overdue, logs the loop thread's
+    # current stack, which is the code holding the loop.
+    def __init__(self, interval: float, block_threshold: float, window: int):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._lags: deque[float] = deque(maxlen=window)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    def percentiles(self) -> dict[float, float]:
+        lags = sorted(self._lags)
+        if not lags:
+            return {quantile: 0.0 for quantile in QUANTILES}
+        return {quantile: lags[min(len(lags) - 1, int(quantile * len(lags)))] for quantile in QUANTILES}
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            self._lags.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            for quantile, value in self.percentiles().items():
+                LOOP_LAG_QUANTILE.labels(str(quantile)).set(value)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.block_threshold or heartbeat == reported:
+                continue
+            # One report per stall: the heartbeat only moves again once the loop is free.
+            reported = heartbeat
+            LOOP_BLOCKS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(no frame)\n'
+            logger.warning('event loop blocked for at least %.0f ms; loop thread stack:\n%s', blocked * 1000, stack)
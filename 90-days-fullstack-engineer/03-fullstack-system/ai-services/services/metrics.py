@@ -0,0 +1,103 @@
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+from fastapi.routing import APIRoute
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Sub-millisecond buckets matter here: validation and cache lookups are measured in microseconds.
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HTTP_REQUESTS = Counter('ai_http_requests_total', 'HTTP requests served', ['method', 'route', 'status'])
+# livesum: under multiple workers the gauge is the sum over live worker processes.
+HTTP_IN_FLIGHT = Gauge('ai_http_requests_in_flight', 'HTTP requests currently being served', multiprocess_mode='livesum')
+HTTP_SECONDS = Histogram('ai_http_request_duration_seconds', 'HTTP request latency', ['route'], buckets=STAGE_BUCKETS)
+STAGE_SECONDS = Histogram(
+    'ai_stage_duration_seconds',
+    'Latency of each stage of the analyze path '
+    '(validation, analyze_document, preprocess, similarity, model_queue, model_call, retry_sleep, local_score)',
+    ['stage'],
+    buckets=STAGE_BUCKETS,
+)
+MODEL_CALLS = Counter('ai_model_calls_total', 'Model call attempts by outcome', ['outcome'])
+LANE_QUEUE_SECONDS = Histogram(
+    'ai_lane_queue_duration_seconds', 'Wait for a model call slot by request class', ['lane'], buckets=STAGE_BUCKETS
+)
+CACHE_LOOKUP_SECONDS = Histogram(
+    'ai_cache_lookup_duration_seconds', 'Result cache lookups by result (hit, l2_hit, revalidate, miss, near_duplicate, fallback)', ['result'],
+    buckets=STAGE_BUCKETS,
+)
+LOOP_LAG_SECONDS = Histogram(
+    'ai_event_loop_lag_seconds', 'How late the event loop ran a timer that was due', buckets=STAGE_BUCKETS
+)
+LOOP_LAG_QUANTILE = Gauge(
+    'ai_event_loop_lag_quantile_seconds', 'Event loop lag percentiles over the recent sample window', ['quantile'],
+    multiprocess_mode='liveall',
+)
+LOOP_BLOCKS = Counter('ai_event_loop_blocks_total', 'Times the event loop was blocked past the threshold')
+
+_handler_started: ContextVar[float | None] = ContextVar('handler_started', default=None)
+
+class InstrumentedRoute(APIRoute):
+    # FastAPI reads and validates the body between the route handler starting and the endpoint being
+    # called, so the gap between the two is the request validation time.
+    def get_route_handler(self):
+        endpoint = self.dependant.call
+
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            started = _handler_started.get()
+            if started is not None:
+                STAGE_SECONDS.labels('validation').observe(time.perf_counter() - started)
+            return await endpoint(*args, **kwargs)
+
+        self.dependant.call = timed_endpoint
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            _handler_started.set(time.perf_counter())
+            return await handler(request)
+
+        return timed_handler
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def record_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Label by route template (e.g. /jobs/{job_id}) to keep label cardinality bounded.
+            route = scope.get('route')
+            path = route.path if route is not None else 'unmatched'
+            HTTP_SECONDS.labels(path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope['method'], path, str(status_code)).inc()
+
+def render() -> tuple[bytes, str]:
+    # With PROMETHEUS_MULTIPROC_DIR set (serve.py does this for several workers) every process writes its
+    # samples there, and whichever worker serves /metrics aggregates all of them.
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def mark_process_dead() -> None:
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,63 @@
+import re
+import unicodedata
+from collections import Counter
+
+# Rough token estimate for English text; close enough to budget chunks without a tokenizer dependency.
+CHARS_PER_TOKEN = 4
+
+# C0/C1 control characters other than tab and newline, plus zero-width and BOM characters.
+_CONTROL = re.compile('[\x00-\x08\x0b-\x1f\x7f-\x9f\u200b-\u200d\u2060\ufeff]')
+_SPACES = re.compile(r'[^\S\n]+')
+_BLANK_LINES = re.compile(r' ?\n[\s]*\n\s*')
+_LINE_BREAK = re.compile(r' ?\n ?')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def normalize_text(text: str) -> str:
+    # NFC, no control characters, single spaces, and at most one blank line between paragraphs.
+    text = unicodedata.normalize('NFC', text.replace('\r\n', '\n').replace('\r', '\n'))
+    text = _CONTROL.sub('', text)
+    text = _SPACES.sub(' ', text)
+    text = _BLANK_LINES.sub('\n\n', text)
+    return _LINE_BREAK.sub('\n', text).strip()
+
+def normalize_document(title: str, content: str) -> tuple[str, str]:
+    return normalize_text(title), normalize_text(content)
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def split_chunks(text: str, max_tokens: int) -> list[str]:
+    # Packs paragraphs, then sentences, then hard cuts into chunks of at most max_tokens.
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+    pieces = []
+    for paragraph in text.split('\n\n'):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            pieces.extend(sentence[start:start + max_chars] for start in range(0, len(sentence), max_chars))
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f'{current}\n{piece}' if current else piece
+    chunks.append(current)
+    return chunks
+
+def merge_results(results: list[dict], weights: list[int]) -> dict:
+    # One result for a document analyzed in chunks: the distinct chunk summaries in document order, the
+    # score averaged by chunk length, and the tags ranked by how many chunks reported them.
+    summaries = list(dict.fromkeys(result['summary'] for result in results))
+    score = sum(result['score'] * weight for result, weight in zip(results, weights)) / sum(weights)
+    counts = Counter(tag for result in results for tag in dict.fromkeys(result['tags']))
+    max_tags = max(len(result['tags']) for result in results)
+    return {
+        'summary': ' '.join(summaries),
+        'score': score,
+        'tags': [tag for tag, _ in counts.most_common(max_tags)],
+    }
@@ -0,0 +1,145 @@
+import asyncio
+import hmac
+import os
+import sys
+import time
+import uuid
+from asyncio import events, tasks
+from collections import defaultdict
+from contextvars import ContextVar
+
+# A deterministic profiler scoped to one request. sys.setprofile sees every frame on the loop thread,
+# but events are only recorded while the request's context (or a task spawned from it) is running,
+# so concurrent requests do not leak into the profile. Time the request spends suspended is charged
+# to the await chain it is suspended on, under an `[await]` leaf.
+
+_active: ContextVar['RequestProfiler | None'] = ContextVar('request_profiler', default=None)
+_installed = 0
+_previous_profile = None
+_HANDLE_RUN = events.Handle._run.__code__
+_TASKS_FILE = tasks.__file__
+
+def _label(entry) -> str:
+    if isinstance(entry, str):
+        return entry
+    name = getattr(entry, 'co_qualname', entry.co_name)
+    return f'{name} ({os.path.basename(entry.co_filename)}:{entry.co_firstlineno})'
+
+def _task_stack(frame) -> tuple:
+    # Walks up to the event loop callback that resumed the task, skipping the Task step frames.
+    codes = []
+    while frame is not None and frame.f_code is not _HANDLE_RUN:
+        code = frame.f_code
+        if not (code.co_filename == _TASKS_FILE and code.co_name.startswith('__step')):
+            codes.append(code)
+        frame = frame.f_back
+    codes.reverse()
+    return tuple(codes)
+
+def _awaiting_stack() -> tuple:
+    # Follows the current task's await chain down to the innermost awaited object.
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return ()
+    awaitable = task.get_coro() if task is not None else None
+    codes = []
+    while awaitable is not None:
+        code = getattr(awaitable, 'cr_code', None) or getattr(awaitable, 'gi_code', None)
+        if code is None:
+            codes.append(type(awaitable).__name__)
+            break
+        codes.append(code)
+        awaitable = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None)
+    return tuple(codes)
+
+class RequestProfiler:
+    def __init__(self):
+        self.seconds: defaultdict[tuple, float] = defaultdict(float)
+        self._last_time: float | None = None
+        self._last_stack: tuple = ()
+        self._suspended_at: tuple = ()
+
+    def record(self, frame, event, arg) -> None:
+        now = time.perf_counter()
+        if self._last_time is not None:
+            stack = self._last_stack or (self._suspended_at + ('[await]',) if self._suspended_at else ())
+            if stack:
+                self.seconds[stack] += now - self._last_time
+        if event == 'call':
+            stack = _task_stack(frame)
+        elif event == 'c_call':
+            stack = _task_stack(frame) + (getattr(arg, '__qualname__', repr(arg)),)
+        elif event == 'return':
+            stack = _task_stack(frame.f_back)
+            if not stack:
+                # The task's root coroutine is returning: either it finished or it is suspending.
+                self._suspended_at = _awaiting_stack()
+        else:
+            stack = _task_stack(frame)
+        self._last_time = now
+        self._last_stack = stack
+
+    def collapsed(self) -> str:
+        lines = [
+            f"{';'.join(_label(entry) for entry in stack)} {round(seconds * 1_000_000)}"
+            for stack, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+        ]
+        return '\n'.join(lines) + '\n'
+
+def _dispatch(frame, event, arg):
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.record(frame, event, arg)
+
+def _install() -> None:
+    global _installed, _previous_profile
+    if _installed == 0:
+        _previous_profile = sys.getprofile()
+        sys.setprofile(_dispatch)
+    _installed += 1
+
+def _uninstall() -> None:
+    global _installed
+    _installed -= 1
+    if _installed == 0:
+        sys.setprofile(_previous_profile)
+
+class ProfilingMiddleware:
+    # Only added to the app when PROFILE_TOKEN is set; without it requests pay nothing.
+    def __init__(self, app, token: str, output_dir: str):
+        self.app = app
+        self.token = token.encode()
+        self.output_dir = output_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        profiler = RequestProfiler()
+        path = os.path.join(self.output_dir, f'{uuid.uuid4().hex}.collapsed')
+
+        async def send_with_profile_header(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (b'x-profile-file', path.encode())]
+            await send(message)
+
+        _install()
+        token = _active.set(profiler)
+        try:
+            await self.app(scope, receive, send_with_profile_header)
+        finally:
+            _active.reset(token)
+            _uninstall()
+            await asyncio.to_thread(self._write, path, profiler.collapsed())
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope['headers']:
+            if name == b'x-profile':
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    def _write(self, path: str, collapsed: str) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as profile:
+            profile.write(collapsed)
@@ -0,0 +1,103 @@
+import asyncio
+import httpx
+from schemas import AnalyzeRequest
+
+class ProviderError(Exception):
+    pass
+
+class ProviderRateLimitedError(ProviderError):
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ModelProvider:
+    # Interface every provider implements. analyze() returns {'summary', 'score', 'tags'};
+    # analyze_batch() returns one such dict per request, in order.
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def analyze(self, request: AnalyzeRequest) -> dict:
+        raise NotImplementedError
+
+    async def analyze_batch(self, requests: list[AnalyzeRequest]) -> list[dict]:
+        return list(await asyncio.gather(*(self.analyze(request) for request in requests)))
+
+class PlaceholderProvider(ModelProvider):
+    # Example placeholder for an LLM call, used when no real provider is configured.
+    async def analyze(self, request: AnalyzeRequest) -> dict:
+        await asyncio.sleep(0.3)
+        return self._analysis(request)
+
+    async def analyze_batch(self, requests: list[AnalyzeRequest]) -> list[dict]:
+        await asyncio.sleep(0.3)
+        return [self._analysis(request) for request in requests]
+
+    def _analysis(self, request: AnalyzeRequest) -> dict:
+        return {
+            'summary': f'Analysis for document {request.document_id}',
+            'score': 0.85,
+            'tags': ['priority', 'summary'],
+        }
+
+class HttpModelProvider(ModelProvider):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        timeout: float,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+        # One pooled client for the process: connections are reused instead of paying TCP/TLS setup per call.
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url, headers=headers, limits=self.limits, timeout=self.timeout
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def analyze(self, request: AnalyzeRequest) -> dict:
+        body = await self._post('/analyze', self._document(request))
+        return self._analysis(body)
+
+    async def analyze_batch(self, requests: list[AnalyzeRequest]) -> list[dict]:
+        body = await self._post('/analyze/batch', {'items': [self._document(request) for request in requests]})
+        return [self._analysis(result) for result in body['results']]
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        if self._client is None:
+            raise RuntimeError('model provider client is not started')
+        response = await self._client.post(path, json=payload)
+        if response.status_code == 429:
+            retry_after = response.headers.get('retry-after')
+            raise ProviderRateLimitedError(
+                'model provider rate limited the request',
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        if response.status_code >= 400:
+            raise ProviderError(f'model provider returned {response.status_code}')
+        return response.json()
+
+    def _document(self, request: AnalyzeRequest) -> dict:
+        return {'document_id': request.document_id, 'title': request.title, 'content': request.content}
+
+    def _analysis(self, body: dict) -> dict:
+        return {'summary': body['summary'], 'score': body['score'], 'tags': body['tags']}
@@ -0,0 +1,30 @@
+from contextvars import ContextVar
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+REQUEST_CLASSES = (INTERACTIVE, BULK)
+
+# The class of the work running in this context; it picks the limiter lane for outbound model calls.
+# Anything not started from a classified request (job workers, background refreshes) is bulk.
+current_class: ContextVar[str] = ContextVar('request_class', default=BULK)
+
+def parse_api_keys(spec: str) -> dict[str, str]:
+    # 'key1:interactive,key2:bulk' -> {'key1': 'interactive', 'key2': 'bulk'}
+    keys = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        key, _, request_class = entry.rpartition(':')
+        if request_class not in REQUEST_CLASSES or not key:
+            raise ValueError(f'invalid REQUEST_CLASS_API_KEYS entry: {entry}')
+        keys[key] = request_class
+    return keys
+
+def resolve(header: str | None, api_key: str | None, api_keys: dict[str, str], default: str) -> str:
+    # A mapped API key decides; otherwise X-Request-Class; otherwise the endpoint's default.
+    if api_key is not None and api_key in api_keys:
+        return api_keys[api_key]
+    if header is None:
+        return default
+    request_class = header.strip().lower()
+    if request_class not in REQUEST_CLASSES:
+        raise ValueError(f"X-Request-Class must be one of: {', '.join(REQUEST_CLASSES)}")
+    return request_class
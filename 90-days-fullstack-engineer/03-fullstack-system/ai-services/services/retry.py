@@ -0,0 +1,69 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        timeout: float,
+        budget: TokenBucket | None = None,
+        retryable: Callable[[Exception], bool] = lambda exc: True,
+        on_backoff: Callable[[float], None] | None = None,
+        retry_after: Callable[[Exception], float | None] = lambda exc: None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.budget = budget
+        self.retryable = retryable
+        self.on_backoff = on_backoff
+        self.retry_after = retry_after
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries out instead of every caller waking up in lockstep.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def run(self, operation: Callable[[], Awaitable], deadline: float | None = None):
+        # Re-raises the last error once attempts, time, or the retry budget run out.
+        # `deadline` is an absolute time.monotonic() value that can tighten the policy timeout.
+        stop_at = time.monotonic() + self.timeout
+        if deadline is not None:
+            stop_at = min(stop_at, deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await operation()
+            except Exception as exc:
+                if attempt >= self.max_attempts or not self.retryable(exc):
+                    raise
+                # A server-given Retry-After is the least we wait; when it outlasts the time left, give up now.
+                delay = max(self.backoff(attempt), self.retry_after(exc) or 0)
+                if time.monotonic() + delay >= stop_at:
+                    raise
+                if self.budget is not None and not self.budget.try_acquire():
+                    raise
+                if self.on_backoff is not None:
+                    self.on_backoff(delay)
+                await asyncio.sleep(delay)
@@ -0,0 +1,122 @@
+import hashlib
+import re
+from collections import Counter, OrderedDict
+import numpy as np
+
+FINGERPRINT_BITS = 64
+SIGNATURE_SIZE = 64
+_WORD = re.compile(r'\w+')
+
+# Each fingerprint bit gets its own 32-bit lane of one big integer, so the per-bit vote counts of all
+# shingles are summed with one big-integer addition per shingle instead of 64 additions.
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = [sum((byte >> bit & 1) << bit * _LANE_BITS for bit in range(8)) for byte in range(256)]
+
+# MinHash permutations: xor with a per-slot seed, then an odd multiplier (uint64 arithmetic wraps).
+_SEEDS = np.random.default_rng(0).integers(0, 2 ** 63, SIGNATURE_SIZE, dtype=np.uint64)
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+def sketch(text: str, shingle_size: int = 2) -> tuple[int, bytes, bytes]:
+    # (SimHash, MinHash signature, digest of the numbers) of a text. The SimHash finds candidates; the
+    # signature estimates the Jaccard similarity of the shingle sets; the numbers must match exactly,
+    # since templated listings often differ only in an id, price or area.
+    words = _WORD.findall(text.lower())
+    shingles = Counter(
+        ' '.join(words[start:start + shingle_size]) for start in range(max(1, len(words) - shingle_size + 1))
+    )
+    digests = [hashlib.blake2b(shingle.encode(), digest_size=8).digest() for shingle in shingles]
+    numbers = '\0'.join(sorted(word for word in words if any(character.isdigit() for character in word)))
+    return (
+        simhash(digests, list(shingles.values())),
+        minhash(digests),
+        hashlib.blake2b(numbers.encode(), digest_size=8).digest(),
+    )
+
+def simhash(digests: list[bytes], weights: list[int]) -> int:
+    # 64-bit SimHash: documents that differ by a few shingles differ in a few bits.
+    votes = 0
+    for digest, weight in zip(digests, weights):
+        spread = 0
+        for position, byte in enumerate(digest):
+            spread |= _SPREAD[byte] << position * 8 * _LANE_BITS
+        votes += spread * weight
+    half = sum(weights) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if votes >> bit * _LANE_BITS & _LANE_MASK > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def minhash(digests: list[bytes]) -> bytes:
+    values = np.frombuffer(b''.join(digests), dtype='<u8')
+    mixed = (values[:, None] ^ _SEEDS[None, :]) * _MULTIPLIER
+    return (mixed.min(axis=0) >> np.uint64(32)).astype('<u4').tobytes()
+
+def similarity(signature: bytes, other: bytes) -> float:
+    # Estimated Jaccard similarity of the two shingle sets.
+    return float(np.mean(np.frombuffer(signature, dtype='<u4') == np.frombuffer(other, dtype='<u4')))
+
+class SimHashIndex:
+    # Multi-index hashing: the fingerprint is cut into max_distance + 1 bands, so by pigeonhole any
+    # fingerprint within max_distance bits agrees exactly with the query on at least one band. A lookup
+    # compares only the entries sharing a band value (about entries / 2**band_bits per band), then confirms
+    # candidates on their numbers and MinHash similarity.
+    def __init__(self, max_distance: int, max_entries: int, min_similarity: float):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        bands = max_distance + 1
+        widths = [FINGERPRINT_BITS // bands + (band < FINGERPRINT_BITS % bands) for band in range(bands)]
+        offsets = [sum(widths[:band]) for band in range(bands)]
+        self._bands = [(offset, (1 << width) - 1) for offset, width in zip(offsets, widths)]
+        self._tables: list[dict[int, set[str]]] = [{} for _ in self._bands]
+        self._entries: OrderedDict[str, tuple[int, bytes, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, document: tuple[int, bytes, bytes]) -> str | None:
+        # The key of the most similar confirmed near-duplicate of a sketch, if any.
+        fingerprint, signature, numbers = document
+        best_key = None
+        best_similarity = self.min_similarity
+        seen = set()
+        for table, (offset, mask) in zip(self._tables, self._bands):
+            for key in table.get(fingerprint >> offset & mask, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                candidate_fingerprint, candidate_signature, candidate_numbers = self._entries[key]
+                if (candidate_fingerprint ^ fingerprint).bit_count() > self.max_distance:
+                    continue
+                if candidate_numbers != numbers:
+                    continue
+                candidate_similarity = similarity(signature, candidate_signature)
+                if candidate_similarity >= best_similarity:
+                    best_key, best_similarity = key, candidate_similarity
+        if best_key is not None:
+            self._entries.move_to_end(best_key)
+        return best_key
+
+    def add(self, document: tuple[int, bytes, bytes], key: str) -> None:
+        if self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self.remove(key)
+        self._entries[key] = document
+        for table, (offset, mask) in zip(self._tables, self._bands):
+            table.setdefault(document[0] >> offset & mask, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, key: str) -> None:
+        document = self._entries.pop(key, None)
+        if document is None:
+            return
+        for table, (offset, mask) in zip(self._tables, self._bands):
+            band = document[0] >> offset & mask
+            keys = table[band]
+            keys.discard(key)
+            if not keys:
+                del table[band]
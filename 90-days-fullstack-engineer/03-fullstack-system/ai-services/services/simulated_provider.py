@@ -0,0 +1,97 @@
+import asyncio
+import math
+import random
+import time
+from schemas import AnalyzeRequest
+from services.provider import ModelProvider, ProviderError, ProviderRateLimitedError
+
+class SimulatedProvider(ModelProvider):
+    # Deterministic stand-in for a real provider: every random draw comes from one seeded generator,
+    # so the same seed and call order reproduce the same latencies and failures.
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: str = 'fixed',
+        latency_ms: float = 300,
+        latency_sigma: float = 0.5,
+        slow_latency_ms: float = 2000,
+        slow_fraction: float = 0.05,
+        failure_rate: float = 0.0,
+        burst_rate: float = 0.0,
+        burst_length: int = 10,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 60,
+        rate_limit_rps: float = 0.0,
+    ):
+        if latency not in ('fixed', 'lognormal', 'bimodal'):
+            raise ValueError(f'unknown latency distribution: {latency}')
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.slow_latency_ms = slow_latency_ms
+        self.slow_fraction = slow_fraction
+        self.failure_rate = failure_rate
+        self.burst_rate = burst_rate
+        self.burst_length = burst_length
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.rate_limit_rps = rate_limit_rps
+        self.calls = 0
+        self._burst_remaining = 0
+        self._window_started = time.monotonic()
+        self._window_calls = 0
+
+    def latency_seconds(self) -> float:
+        if self.latency == 'lognormal':
+            # latency_ms is the median; sigma controls the tail.
+            return self.random.lognormvariate(math.log(self.latency_ms), self.latency_sigma) / 1000
+        if self.latency == 'bimodal':
+            slow = self.random.random() < self.slow_fraction
+            return (self.slow_latency_ms if slow else self.latency_ms) / 1000
+        return self.latency_ms / 1000
+
+    async def analyze(self, request: AnalyzeRequest) -> dict:
+        await self._simulate_call()
+        return self._analysis(request)
+
+    async def analyze_batch(self, requests: list[AnalyzeRequest]) -> list[dict]:
+        await self._simulate_call()
+        return [self._analysis(request) for request in requests]
+
+    async def _simulate_call(self) -> None:
+        self.calls += 1
+        self._check_rate_limit()
+        # Draw everything up front so the sequence does not depend on how long the awaits take.
+        delay = self.latency_seconds()
+        hangs = self.random.random() < self.timeout_rate
+        fails = self.random.random() < self.failure_rate
+        if self._burst_remaining == 0 and self.random.random() < self.burst_rate:
+            self._burst_remaining = self.burst_length
+        in_burst = self._burst_remaining > 0
+        if in_burst:
+            self._burst_remaining -= 1
+        if hangs:
+            await asyncio.sleep(self.timeout_seconds)
+            raise ProviderError('simulated provider timed out')
+        await asyncio.sleep(delay)
+        if fails or in_burst:
+            raise ProviderError('simulated provider failure')
+
+    def _check_rate_limit(self) -> None:
+        if not self.rate_limit_rps:
+            return
+        now = time.monotonic()
+        if now - self._window_started >= 1:
+            self._window_started = now
+            self._window_calls = 0
+        self._window_calls += 1
+        if self._window_calls > self.rate_limit_rps:
+            raise ProviderRateLimitedError('simulated provider rate limit', 1 - (now - self._window_started))
+
+    def _analysis(self, request: AnalyzeRequest) -> dict:
+        return {
+            'summary': f'Simulated analysis for document {request.document_id}',
+            'score': round(self.random.random(), 3),
+            'tags': ['simulated'],
+        }
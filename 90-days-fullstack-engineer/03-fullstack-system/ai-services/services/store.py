@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Key-value stores for state shared between worker processes (result cache, circuit state).
+# All expose async get / set / delete with an optional TTL in seconds; values are bytes.
+
+class MemoryStore:
+    # Per-process only; the default for a single worker.
+    def __init__(self):
+        self._values: dict[str, tuple[bytes, float | None]] = {}
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self._values[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    async def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+
+class SqliteStore:
+    # A WAL-mode SQLite file on local disk, shared by every worker on the host.
+    def __init__(self, path: str, prune_every: int = 1000):
+        self.path = path
+        self.prune_every = prune_every
+        self._writes = 0
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self._setup)
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self._writes += 1
+        prune = self._writes % self.prune_every == 0
+        await asyncio.to_thread(self._set, key, value, time.time() + ttl if ttl is not None else None, prune)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def _setup(self) -> None:
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)'
+            )
+
+    def _get(self, key: str) -> bytes | None:
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)', (key, time.time())
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def _set(self, key: str, value: bytes, expires_at: float | None, prune: bool) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)', (key, value, expires_at)
+            )
+            if prune:
+                connection.execute('DELETE FROM kv WHERE expires_at <= ?', (time.time(),))
+
+    def _delete(self, key: str) -> None:
+        with self._connect() as connection:
+            connection.execute('DELETE FROM kv WHERE key = ?', (key,))
+
+class RedisStore:
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as error:
+            raise RuntimeError('SHARED_STORE=redis requires the redis package (pip install redis)') from error
+        self._client = redis.from_url(url)
+
+    async def start(self) -> None:
+        await self._client.ping()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        await self._client.set(key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+def create_store(backend: str, sqlite_path: str, redis_url: str | None):
+    if backend == 'memory':
+        return MemoryStore()
+    if backend == 'sqlite':
+        return SqliteStore(sqlite_path)
+    if backend == 'redis':
+        return RedisStore(redis_url or 'redis://localhost:6379')
+    raise ValueError(f'unknown shared store: {backend}')
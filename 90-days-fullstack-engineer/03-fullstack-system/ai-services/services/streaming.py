@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable
+from starlette.responses import StreamingResponse
+
+_END = object()
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[tuple[int, bytes | None]]:
+    # Yields (index, line) per non-blank line, where index is the line's 0-based position in the body
+    # (blank lines count) and a CRLF ending is dropped; an oversized line is skipped and yielded as None.
+    buffer = b''
+    skipping = False
+    index = 0
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b'\n')
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline].removesuffix(b'\r'), buffer[newline + 1:]
+            if skipping:
+                skipping = False
+            elif line.strip():
+                yield index, line if len(line) <= max_line_bytes else None
+            index += 1
+        # One byte of slack for the \r of a CRLF ending whose \n has not arrived yet.
+        if len(buffer) > max_line_bytes + 1 and not skipping:
+            yield index, None
+            skipping = True
+        if skipping:
+            buffer = b''
+    line = buffer.removesuffix(b'\r')
+    if line.strip() and not skipping:
+        yield index, line if len(line) <= max_line_bytes else None
+
+async def map_unordered(
+    items: AsyncIterator, worker: Callable[[Any], Awaitable], concurrency: int
+) -> AsyncIterator:
+    # Runs at most `concurrency` workers and yields results as they finish. The next input is only
+    # pulled when a worker slot is free, so a slow consumer throttles reading of the request body.
+    iterator = items.__aiter__()
+
+    async def next_item():
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return _END
+
+    pending: set[asyncio.Task] = set()
+    reader: asyncio.Task | None = None
+    exhausted = False
+    try:
+        while True:
+            if reader is None and not exhausted and len(pending) < concurrency:
+                reader = asyncio.ensure_future(next_item())
+            waiting = pending | {reader} if reader is not None else pending
+            if not waiting:
+                return
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                item = reader.result()
+                reader = None
+                if item is _END:
+                    exhausted = True
+                else:
+                    pending.add(asyncio.ensure_future(worker(item)))
+            for task in done & pending:
+                pending.discard(task)
+                yield task.result()
+    finally:
+        for task in pending | ({reader} if reader is not None else set()):
+            task.cancel()
+
+class NDJSONStreamingResponse(StreamingResponse):
+    media_type = 'application/x-ndjson'
+
+    async def __call__(self, scope, receive, send) -> None:
+        # The body iterator consumes the request body itself, so unlike StreamingResponse this must not
+        # run a concurrent disconnect listener on `receive`; a disconnect surfaces through request.stream().
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        async for chunk in self.body_iterator:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode(self.charset)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
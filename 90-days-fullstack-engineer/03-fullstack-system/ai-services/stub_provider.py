@@ -0,0 +1,44 @@
+# Minimal stand-in for the model provider, for local runs, tests and load tests:
+#   STUB_LATENCY_MS=300 STUB_ERROR_RATE=0.05 uvicorn stub_provider:app --port 9000
+#   MODEL_PROVIDER_URL=http://localhost:9000 uvicorn main:app --port 8000
+import asyncio
+import os
+import random
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+LATENCY_SECONDS = float(os.getenv('STUB_LATENCY_MS', '0')) / 1000
+ERROR_RATE = float(os.getenv('STUB_ERROR_RATE', '0'))
+
+app = FastAPI(title='Stub Model Provider')
+
+class ProviderRequest(BaseModel):
+    document_id: int
+    title: str
+    content: str
+
+class ProviderBatchRequest(BaseModel):
+    items: list[ProviderRequest]
+
+def stub_analysis(request: ProviderRequest) -> dict:
+    return {
+        'summary': f'Stub analysis for document {request.document_id}',
+        'score': 0.5,
+        'tags': ['stub'],
+    }
+
+async def simulate_provider() -> None:
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    if random.random() < ERROR_RATE:
+        raise HTTPException(status_code=503, detail='stub provider error')
+
+@app.post('/analyze')
+async def analyze(request: ProviderRequest):
+    await simulate_provider()
+    return stub_analysis(request)
+
+@app.post('/analyze/batch')
+async def analyze_batch(request: ProviderBatchRequest):
+    await simulate_provider()
+    return {'results': [stub_analysis(item) for item in request.items]}
@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+# The service runs in-process: no worker processes, no loop monitor thread, nothing written to disk.
+os.environ.setdefault('CPU_POOL_WORKERS', '0')
+os.environ.setdefault('LOOP_MONITOR', '0')
+os.environ.setdefault('RESULT_CACHE_L2', 'off')
+os.environ.setdefault('SHARED_STORE', 'memory')
+os.environ.setdefault('JOB_BACKEND', 'memory')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
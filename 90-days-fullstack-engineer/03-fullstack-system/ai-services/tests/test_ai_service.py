@@ -0,0 +1,96 @@
+import asyncio
+import time
+import pytest
+from schemas import AnalyzeRequest
+from services import ai_service
+from services.cache import content_key
+from services.circuit_breaker import CLOSED, CircuitBreaker
+from services.errors import DeadlineExceededError
+from services.provider import ProviderRateLimitedError
+from services.simulated_provider import SimulatedProvider
+
+pytestmark = pytest.mark.anyio
+
+def document(text: str) -> AnalyzeRequest:
+    # Already normalized, so the cache key can be computed from it directly.
+    return AnalyzeRequest(document_id=7, title=f'Document {text}', content=f'{text}: ' + ' '.join(['Plain text.'] * 5))
+
+@pytest.fixture
+def provider(monkeypatch) -> SimulatedProvider:
+    simulated = SimulatedProvider(latency_ms=0)
+    monkeypatch.setattr(ai_service, 'model_provider', simulated)
+    monkeypatch.setattr(ai_service, 'model_batcher', None)
+    monkeypatch.setattr(
+        ai_service,
+        'circuit_breaker',
+        CircuitBreaker(window_size=10, min_calls=10, failure_rate=0.5, cooldown_seconds=30, ignore=(ProviderRateLimitedError,)),
+    )
+    return simulated
+
+async def test_failing_provider_serves_the_stale_entry(provider, monkeypatch):
+    monkeypatch.setattr(ai_service.retry_policy, 'max_attempts', 1)
+    provider.failure_rate = 1.0
+    request = document('stale if error')
+    stale = {'summary': 'from yesterday', 'score': 0.4, 'tags': ['old']}
+    ai_service.result_cache.l1.set(content_key(request.title, request.content), stale, ttl=-3600)
+    response = await ai_service.analyze_document(request)
+    assert response.summary == 'from yesterday'
+    assert 'previously cached' in response.warnings[0]
+
+async def test_failing_provider_without_cache_answers_locally(provider, monkeypatch):
+    monkeypatch.setattr(ai_service.retry_policy, 'max_attempts', 1)
+    provider.failure_rate = 1.0
+    response = await ai_service.analyze_document(document('local fallback'), use_cache=False)
+    assert 'local analysis' in response.warnings[0]
+
+async def test_expired_deadline_is_not_answered_locally(provider):
+    provider.latency_ms = 1000
+    with pytest.raises(DeadlineExceededError):
+        await ai_service.analyze_document(document('deadline'), deadline=time.monotonic() + 0.05)
+
+async def test_short_deadline_does_not_fail_a_caller_sharing_its_call(provider):
+    provider.latency_ms = 100
+    request = document('shared call')
+    now = time.monotonic()
+    short = asyncio.ensure_future(ai_service.analyze_document(request, use_cache=False, deadline=now + 0.02))
+    await asyncio.sleep(0)
+    long = asyncio.ensure_future(ai_service.analyze_document(request, use_cache=False, deadline=now + 5))
+    with pytest.raises(DeadlineExceededError):
+        await short
+    assert (await long).summary.startswith('Simulated analysis')
+    assert provider.calls == 1
+
+async def test_rate_limit_waits_for_retry_after(provider):
+    provider.rate_limit_rps = 1
+    await provider.analyze(document('warm up'))
+    started = time.monotonic()
+    response = await ai_service.analyze_document(document('retry after'), use_cache=False)
+    assert response.summary.startswith('Simulated analysis')
+    assert time.monotonic() - started >= 0.8
+    assert provider.calls == 3
+    assert ai_service.circuit_breaker.state == CLOSED
+
+async def test_batch_items_get_their_own_deadline(provider):
+    provider.latency_ms = 100
+    requests = [document(f'batch item {index}') for index in range(6)]
+    # Three rounds of 0.1 s each: one deadline for the whole batch would expire during the second.
+    outcomes = await ai_service.analyze_batch(requests, concurrency=2, use_cache=False, timeout=0.15)
+    assert [type(outcome).__name__ for outcome in outcomes] == ['AnalyzeResponse'] * 6
+
+async def test_no_cache_request_never_gets_the_stale_entry(provider, monkeypatch):
+    monkeypatch.setattr(ai_service.retry_policy, 'max_attempts', 1)
+    provider.failure_rate = 1.0
+    request = document('no cache')
+    stale = {'summary': 'from yesterday', 'score': 0.4, 'tags': ['old']}
+    ai_service.result_cache.l1.set(content_key(request.title, request.content), stale, ttl=-3600)
+    response = await ai_service.analyze_document(request, use_cache=False)
+    assert response.summary != 'from yesterday'
+    assert 'local analysis' in response.warnings[0]
+
+async def test_expired_deadline_is_a_timeout_even_with_a_stale_entry(provider):
+    provider.latency_ms = 1000
+    request = document('deadline with stale entry')
+    stale = {'summary': 'from yesterday', 'score': 0.4, 'tags': ['old']}
+    ai_service.result_cache.l1.set(content_key(request.title, request.content), stale, ttl=-3600)
+    with pytest.raises(DeadlineExceededError):
+        await ai_service.analyze_document(request, deadline=time.monotonic() + 0.05)
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from services.batcher import MicroBatcher
+
+pytestmark = pytest.mark.anyio
+
+class Handler:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.batches = []
+
+    async def __call__(self, items: list) -> list:
+        self.batches.append(items)
+        if self.error is not None:
+            raise self.error
+        return [ValueError(item) if item < 0 else item * 10 for item in items]
+
+async def test_full_batch_is_sent_at_once():
+    handler = Handler()
+    batcher = MicroBatcher(handler, max_batch_size=3, max_wait=10)
+    assert await asyncio.gather(*(batcher.submit(item) for item in range(3))) == [0, 10, 20]
+    assert handler.batches == [[0, 1, 2]]
+
+async def test_partial_batch_is_sent_after_max_wait():
+    handler = Handler()
+    batcher = MicroBatcher(handler, max_batch_size=10, max_wait=0.01)
+    assert await asyncio.gather(batcher.submit(1), batcher.submit(2)) == [10, 20]
+    assert handler.batches == [[1, 2]]
+
+async def test_item_errors_reach_only_their_caller():
+    batcher = MicroBatcher(Handler(), max_batch_size=2, max_wait=10)
+    outcomes = await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+    assert outcomes[0] == 10
+    assert isinstance(outcomes[1], ValueError)
+
+async def test_handler_error_fails_the_whole_batch():
+    batcher = MicroBatcher(Handler(error=RuntimeError('provider down')), max_batch_size=2, max_wait=10)
+    outcomes = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+    assert [str(outcome) for outcome in outcomes] == ['provider down'] * 2
+
+async def test_callers_that_gave_up_are_left_out():
+    handler = Handler()
+    batcher = MicroBatcher(handler, max_batch_size=10, max_wait=0.02)
+    abandoned = asyncio.ensure_future(batcher.submit(1))
+    await asyncio.sleep(0)
+    abandoned.cancel()
+    assert await batcher.submit(2) == 20
+    assert handler.batches == [[2]]
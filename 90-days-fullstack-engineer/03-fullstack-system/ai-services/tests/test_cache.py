@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from services.cache import HIT, L2_HIT, MISS, REVALIDATE, ResultCache, SharedResultCache, TieredCache
+from services.store import MemoryStore
+
+pytestmark = pytest.mark.anyio
+
+VALUE = {'summary': 'cached', 'score': 0.5, 'tags': []}
+
+def tiered(with_l2: bool = False) -> TieredCache:
+    l2 = SharedResultCache(MemoryStore(), ttl_seconds=60, retain_seconds=600) if with_l2 else None
+    return TieredCache(ResultCache(1024 * 1024, 60), l2, stale_while_revalidate=10)
+
+async def test_fresh_entry_is_a_hit():
+    cache = tiered()
+    cache.set('key', VALUE)
+    assert await cache.get('key') == (VALUE, HIT)
+    assert await cache.get('other') == (None, MISS)
+
+async def test_l2_hit_is_promoted_to_l1():
+    cache = tiered(with_l2=True)
+    await cache.l2.set('key', VALUE)
+    assert await cache.get('key') == (VALUE, L2_HIT)
+    assert await cache.get('key') == (VALUE, HIT)
+
+async def test_recently_expired_entry_is_served_for_revalidation():
+    cache = tiered()
+    cache.l1.set('key', VALUE, ttl=-1)
+    assert await cache.get('key') == (VALUE, REVALIDATE)
+
+async def test_long_expired_entry_is_a_miss_but_still_a_fallback():
+    cache = tiered()
+    cache.l1.set('key', VALUE, ttl=-60)
+    assert await cache.get('key') == (None, MISS)
+    assert await cache.get_stale('key') == VALUE
+
+async def test_stale_fallback_reads_through_to_l2():
+    cache = tiered(with_l2=True)
+    await cache.l2.store.set('result:key', b'[0, {"summary": "old", "score": 0.1, "tags": []}]', 600)
+    assert await cache.get('key') == (None, MISS)
+    assert (await cache.get_stale('key'))['summary'] == 'old'
+
+async def test_writes_reach_l2_behind_the_request():
+    cache = tiered(with_l2=True)
+    await cache.start()
+    cache.set('key', VALUE)
+    await cache.close()
+    value, expires_in = await cache.l2.lookup('key')
+    assert value == VALUE and expires_in > 0
+    assert cache.stats()['l2_pending_writes'] == 0
+
+def test_write_behind_works_again_after_a_restart_on_a_new_loop():
+    cache = tiered(with_l2=True)
+
+    async def session(key: str):
+        await cache.start()
+        cache.set(key, VALUE)
+        await cache.close()
+        return await cache.l2.lookup(key)
+
+    # Each asyncio.run is a fresh event loop, as in a second app lifespan.
+    for key in ('first', 'second'):
+        assert asyncio.run(session(key))[0] == VALUE
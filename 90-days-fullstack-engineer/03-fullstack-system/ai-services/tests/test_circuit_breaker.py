@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from schemas import AnalyzeRequest
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from services.provider import ProviderError, ProviderRateLimitedError
+from services.simulated_provider import SimulatedProvider
+
+pytestmark = pytest.mark.anyio
+
+REQUEST = AnalyzeRequest(document_id=1, title='Breaker test', content='A document used to drive the breaker. ' * 2)
+
+def breaker(**overrides) -> CircuitBreaker:
+    settings = {'window_size': 4, 'min_calls': 4, 'failure_rate': 0.5, 'cooldown_seconds': 0.05}
+    return CircuitBreaker(**{**settings, **overrides})
+
+async def fail_times(circuit: CircuitBreaker, provider: SimulatedProvider, count: int) -> None:
+    for _ in range(count):
+        with pytest.raises(ProviderError):
+            await circuit.call(provider.analyze, REQUEST)
+
+async def test_opens_after_failure_rate_and_fails_fast():
+    provider = SimulatedProvider(latency_ms=0, failure_rate=1.0)
+    circuit = breaker()
+    await fail_times(circuit, provider, 3)
+    assert circuit.state == CLOSED
+    await fail_times(circuit, provider, 1)
+    assert circuit.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        await circuit.call(provider.analyze, REQUEST)
+    assert provider.calls == 4
+
+async def test_half_open_probe_success_closes():
+    provider = SimulatedProvider(latency_ms=0, failure_rate=1.0)
+    circuit = breaker()
+    await fail_times(circuit, provider, 4)
+    await asyncio.sleep(0.06)
+    assert circuit.state == HALF_OPEN
+    provider.failure_rate = 0.0
+    await circuit.call(provider.analyze, REQUEST)
+    assert circuit.state == CLOSED
+
+async def test_half_open_probe_failure_reopens():
+    provider = SimulatedProvider(latency_ms=0, failure_rate=1.0)
+    circuit = breaker()
+    await fail_times(circuit, provider, 4)
+    await asyncio.sleep(0.06)
+    await fail_times(circuit, provider, 1)
+    assert circuit.state == OPEN
+
+async def test_half_open_admits_only_max_probes():
+    provider = SimulatedProvider(latency_ms=0, failure_rate=1.0)
+    circuit = breaker()
+    await fail_times(circuit, provider, 4)
+    await asyncio.sleep(0.06)
+    provider.failure_rate = 0.0
+    provider.latency_ms = 50
+    probe = asyncio.ensure_future(circuit.call(provider.analyze, REQUEST))
+    await asyncio.sleep(0.01)
+    with pytest.raises(CircuitOpenError):
+        await circuit.call(provider.analyze, REQUEST)
+    await probe
+    assert circuit.state == CLOSED
+
+async def test_ignored_errors_do_not_count():
+    provider = SimulatedProvider(latency_ms=0, rate_limit_rps=1)
+    circuit = breaker(min_calls=1, ignore=(ProviderRateLimitedError,))
+    await circuit.call(provider.analyze, REQUEST)
+    for _ in range(5):
+        with pytest.raises(ProviderRateLimitedError):
+            await circuit.call(provider.analyze, REQUEST)
+    assert circuit.state == CLOSED
+
+async def test_cancelled_probe_frees_its_slot():
+    provider = SimulatedProvider(latency_ms=0, failure_rate=1.0)
+    circuit = breaker()
+    await fail_times(circuit, provider, 4)
+    await asyncio.sleep(0.06)
+    provider.failure_rate = 0.0
+    provider.latency_ms = 1000
+    probe = asyncio.ensure_future(circuit.call(provider.analyze, REQUEST))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert circuit.state == HALF_OPEN
+    provider.latency_ms = 0
+    await circuit.call(provider.analyze, REQUEST)
+    assert circuit.state == CLOSED
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+from services.errors import OverloadedError
+from services.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, InMemoryJobQueue, JobRunner, SqliteJobQueue
+
+DOCUMENT = {'document_id': 3, 'title': 'Queued job', 'content': 'A document analyzed through the job queue. ' * 2}
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def queue(request, tmp_path):
+    if request.param == 'memory':
+        return InMemoryJobQueue(max_pending=2, retention_seconds=60)
+    return SqliteJobQueue(str(tmp_path / 'jobs.db'), max_pending=2, retention_seconds=60, poll_interval=0.01)
+
+@pytest.mark.anyio
+async def test_jobs_are_claimed_in_submission_order(queue):
+    await queue.start()
+    first = await queue.submit({'n': 1})
+    second = await queue.submit({'n': 2})
+    assert await queue.claim() == (first, {'n': 1})
+    assert (await queue.get(first))['status'] == RUNNING
+    assert (await queue.get(second))['status'] == QUEUED
+    assert await queue.claim() == (second, {'n': 2})
+
+@pytest.mark.anyio
+async def test_finished_jobs_keep_their_result_or_error(queue):
+    await queue.start()
+    done = await queue.submit({'n': 1})
+    broken = await queue.submit({'n': 2})
+    await queue.claim()
+    await queue.claim()
+    await queue.complete(done, {'score': 0.5})
+    await queue.fail(broken, {'code': 'AI_SERVICE_ERROR', 'message': 'boom'})
+    assert (await queue.get(done))['status'] == SUCCEEDED
+    assert (await queue.get(done))['result'] == {'score': 0.5}
+    assert (await queue.get(broken))['status'] == FAILED
+    assert (await queue.get(broken))['error']['message'] == 'boom'
+    assert await queue.get('missing') is None
+
+@pytest.mark.anyio
+async def test_full_queue_rejects_new_jobs(queue):
+    await queue.start()
+    await queue.submit({'n': 1})
+    await queue.submit({'n': 2})
+    with pytest.raises(OverloadedError):
+        await queue.submit({'n': 3})
+    await queue.claim()
+    await queue.submit({'n': 3})
+
+@pytest.mark.anyio
+async def test_running_jobs_are_queued_again_on_restart(queue):
+    await queue.start()
+    job_id = await queue.submit({'n': 1})
+    await queue.claim()
+    await queue.start()
+    assert (await queue.get(job_id))['status'] == QUEUED
+    assert await queue.claim() == (job_id, {'n': 1})
+
+@pytest.mark.anyio
+async def test_runner_records_handler_failures():
+    async def handler(payload: dict) -> dict:
+        if payload['n'] == 2:
+            raise ValueError('bad payload')
+        return {'n': payload['n']}
+
+    runner = JobRunner(
+        InMemoryJobQueue(max_pending=10, retention_seconds=60),
+        handler,
+        lambda exc: {'code': 'AI_SERVICE_ERROR', 'message': str(exc)},
+        workers=2,
+    )
+    await runner.start()
+    try:
+        done = await runner.queue.submit({'n': 1})
+        broken = await runner.queue.submit({'n': 2})
+        for _ in range(100):
+            statuses = [(await runner.queue.get(job_id))['status'] for job_id in (done, broken)]
+            if statuses == [SUCCEEDED, FAILED]:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await runner.stop()
+    assert (await runner.queue.get(done))['result'] == {'n': 1}
+    assert (await runner.queue.get(broken))['error']['message'] == 'bad payload'
+
+def run_job(client: TestClient) -> dict:
+    job_id = client.post('/jobs', json=DOCUMENT).json()['job_id']
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = client.get(f'/jobs/{job_id}').json()
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+def test_jobs_run_across_app_restarts(caplog):
+    # Each TestClient lifespan runs on its own event loop, like a restarted embedded server.
+    for _ in range(2):
+        with TestClient(main.app) as client:
+            assert run_job(client)['status'] == 'succeeded'
+    assert not [record for record in caplog.records if record.name == 'ai_service.jobs']
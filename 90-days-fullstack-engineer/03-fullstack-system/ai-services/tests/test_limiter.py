@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from services.limiter import AdaptiveLimiter, Lane, LimitExceededError, QueueDeadlineError
+
+pytestmark = pytest.mark.anyio
+
+def lanes(bulk_share: float = 1.0) -> dict[str, Lane]:
+    return {'interactive': Lane(4, 1.0, 10, 1.0), 'bulk': Lane(1, bulk_share, 10, 1.0)}
+
+async def test_acquires_without_waiting_under_the_limit():
+    limiter = AdaptiveLimiter(2, 1, 10, latency_target=1)
+    await limiter.acquire(1.0)
+    await limiter.acquire(1.0)
+    assert limiter.in_flight == 2
+
+async def test_full_queue_is_rejected():
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1, max_queue=1)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(LimitExceededError, match='queue is full'):
+        await limiter.acquire()
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 1
+
+async def test_queue_timeout_is_load_shedding():
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1, queue_timeout=0.02)
+    await limiter.acquire()
+    with pytest.raises(LimitExceededError) as raised:
+        await limiter.acquire(1.0)
+    assert not isinstance(raised.value, QueueDeadlineError)
+
+async def test_deadline_shorter_than_queue_timeout_is_a_deadline_error():
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1, queue_timeout=1.0)
+    await limiter.acquire()
+    with pytest.raises(QueueDeadlineError):
+        await limiter.acquire(0.02)
+    assert limiter.waiting() == {'default': 0}
+
+async def test_release_hands_the_slot_to_a_waiter():
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.wait_for(waiter, 0.1)
+    assert limiter.in_flight == 1
+
+async def test_failures_cut_the_limit_and_successes_grow_it():
+    limiter = AdaptiveLimiter(10, 1, 20, latency_target=1, backoff_ratio=0.5)
+    await limiter.acquire()
+    limiter.release(success=False)
+    assert limiter.limit == 5
+    await limiter.acquire()
+    limiter.release(success=True)
+    assert limiter.limit == pytest.approx(5.2)
+
+async def test_backlogged_lanes_share_slots_by_weight():
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1, lanes={**lanes(), 'other': Lane(1, 1.0, 1, 1.0)})
+    await limiter.acquire(lane='other')
+    order = []
+
+    async def take(lane: str) -> None:
+        await limiter.acquire(lane=lane)
+        order.append(lane[0])
+        limiter.release(lane=lane)
+
+    tasks = [asyncio.ensure_future(take('bulk')) for _ in range(10)]
+    tasks += [asyncio.ensure_future(take('interactive')) for _ in range(10)]
+    await asyncio.sleep(0)
+    limiter.release(lane='other')
+    await asyncio.gather(*tasks)
+    # Weights 4:1 while both lanes are backlogged, even though bulk queued first.
+    assert ''.join(order[:10]) == 'iiiibiiiib'
+
+async def test_capped_lane_leaves_a_slot_for_the_others():
+    limiter = AdaptiveLimiter(2, 1, 2, latency_target=1, lanes=lanes(bulk_share=0.75))
+    await limiter.acquire(lane='bulk')
+    second_bulk = asyncio.ensure_future(limiter.acquire(lane='bulk'))
+    await asyncio.sleep(0)
+    assert limiter.waiting()['bulk'] == 1
+    await asyncio.wait_for(limiter.acquire(lane='interactive'), 0.1)
+    limiter.release(lane='bulk')
+    await asyncio.wait_for(second_bulk, 0.1)
+
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release()
+    assert limiter.in_flight == 0
+    assert limiter.waiting() == {'default': 0}
+
+async def test_slot_handed_over_as_the_wait_times_out_is_given_back(monkeypatch):
+    limiter = AdaptiveLimiter(1, 1, 1, latency_target=1)
+    await limiter.acquire()
+
+    async def handed_over_then_timed_out(waiter, timeout):
+        # The holder finishes and the slot goes to this waiter in the same iteration the timeout fires,
+        # which asyncio.wait_for reports as a timeout on Python 3.12.
+        limiter.release()
+        assert waiter.done()
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(asyncio, 'wait_for', handed_over_then_timed_out)
+    with pytest.raises(LimitExceededError):
+        await limiter.acquire()
+    assert limiter.in_flight == 0
+    assert limiter.lanes['default'].in_flight == 0
@@ -0,0 +1,49 @@
+import zlib
+import numpy as np
+import pytest
+from services.local_scorer import LocalScorer, fit_idf, lead_summary, load_idf, vectorize
+
+FEATURES = 1024
+DOCUMENTS = [
+    ('Solar panels', 'Solar panels convert sunlight into electricity. Solar farms keep growing.'),
+    ('Cheese', 'Cheese is made from milk. Aged cheese has a stronger flavour than fresh cheese.'),
+]
+
+def scorer(idf: np.ndarray | None = None) -> LocalScorer:
+    return LocalScorer(FEATURES, max_tags=3, title_weight=2, idf=idf)
+
+def test_tags_are_the_heaviest_terms_without_stopwords():
+    results = scorer().score(vectorize(DOCUMENTS, 2, FEATURES))
+    assert results[0]['tags'][:2] == ['solar', 'panels']
+    assert results[1]['tags'][0] == 'cheese'
+    assert all(0 < result['score'] <= 1 for result in results)
+    assert not {'from', 'into', 'than'} & {tag for result in results for tag in result['tags']}
+
+def test_score_does_not_depend_on_the_rest_of_the_batch():
+    alone = scorer().score(vectorize(DOCUMENTS[1:], 2, FEATURES))
+    together = scorer().score(vectorize(DOCUMENTS, 2, FEATURES))
+    assert alone[0] == together[1]
+
+def test_document_without_terms_scores_zero():
+    assert scorer().score(vectorize([('A 1', '12 34 56')], 2, FEATURES)) == [{'score': 0.0, 'tags': []}]
+
+def test_fitted_idf_favours_rare_terms(tmp_path):
+    corpus = vectorize(DOCUMENTS + [('Cheese again', 'More cheese.')], 2, FEATURES)
+    idf = fit_idf(corpus, FEATURES)
+    path = tmp_path / 'idf.npy'
+    np.save(path, idf)
+    loaded = load_idf(str(path), FEATURES)
+    assert np.array_equal(loaded, idf)
+    feature = lambda term: zlib.crc32(term.encode()) % FEATURES
+    assert idf[feature('milk')] > idf[feature('cheese')]
+
+def test_idf_of_another_size_is_rejected(tmp_path):
+    path = tmp_path / 'idf.npy'
+    np.save(path, np.ones(FEATURES // 2))
+    with pytest.raises(ValueError, match='LOCAL_SCORER_FEATURES'):
+        load_idf(str(path), FEATURES)
+    assert load_idf(None, FEATURES) is None
+
+def test_lead_summary_keeps_whole_sentences():
+    assert lead_summary('First one. Second one. Third one.', 25) == 'First one. Second one.'
+    assert lead_summary('A single sentence that runs long.', 8) == 'A single'
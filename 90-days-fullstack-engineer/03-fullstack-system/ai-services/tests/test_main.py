@@ -0,0 +1,85 @@
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+
+@pytest.fixture(scope='module')
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+def document(document_id: int, topic: str) -> dict:
+    return {
+        'document_id': document_id,
+        'title': f'Notes on {topic}',
+        'content': f'These notes cover {topic} in some detail. ' * 3,
+    }
+
+def test_analyze(client):
+    response = client.post('/analyze', json=document(1, 'endpoint analysis'))
+    assert response.status_code == 200
+    assert response.json()['document_id'] == 1
+    assert response.json()['summary']
+
+def test_invalid_request_is_rejected(client):
+    response = client.post('/analyze', json={'document_id': 1, 'title': 'Short', 'content': 'too short'})
+    assert response.status_code == 422
+
+def test_repeat_is_a_cache_hit_unless_no_cache(client):
+    body = document(2, 'cache headers')
+    client.post('/analyze', json=body)
+    hits = client.get('/cache/stats').json()['hits']
+    client.post('/analyze', json=body)
+    assert client.get('/cache/stats').json()['hits'] == hits + 1
+    client.post('/analyze', json=body, headers={'Cache-Control': 'no-cache'})
+    assert client.get('/cache/stats').json()['hits'] == hits + 1
+
+def test_batch_reports_each_item(client):
+    items = [document(3, 'batch item one'), document(4, 'batch item two')]
+    response = client.post('/analyze/batch', json={'items': items, 'concurrency': 2})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [(result['index'], result['document_id']) for result in results] == [(0, 3), (1, 4)]
+    assert all(result['result'] is not None and result['error'] is None for result in results)
+
+def test_stream_answers_each_line(client):
+    lines = [json.dumps(document(5, 'stream item')), '', '{"document_id": 6}']
+    response = client.post('/analyze/stream', content='\n'.join(lines) + '\n')
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(record.get('document_id', 0) for record in records) == [0, 5]
+    (failed,) = [record for record in records if 'error' in record]
+    assert failed['index'] == 2
+    assert failed['error']['code'] == 'INVALID_REQUEST'
+
+def test_score(client):
+    items = [document(7, 'solar panels'), document(8, 'aged cheese')]
+    response = client.post('/score', json={'items': items})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [result['document_id'] for result in results] == [7, 8]
+    assert 'solar' in results[0]['tags']
+
+def test_job_lifecycle(client):
+    submitted = client.post('/jobs', json=document(9, 'queued work'))
+    assert submitted.status_code == 202
+    job_id = submitted.json()['job_id']
+    for _ in range(100):
+        if client.get(f'/jobs/{job_id}').json()['status'] == 'succeeded':
+            break
+        time.sleep(0.05)
+    result = client.get(f'/jobs/{job_id}/result')
+    assert result.status_code == 200
+    assert result.json()['document_id'] == 9
+
+def test_unknown_job_is_a_404(client):
+    response = client.get('/jobs/missing')
+    assert response.status_code == 404
+    assert response.json()['code'] == 'JOB_NOT_FOUND'
+
+def test_metrics(client):
+    client.post('/analyze', json=document(10, 'metrics'))
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert 'text/plain' in response.headers['content-type']
@@ -0,0 +1,35 @@
+from services.preprocess import CHARS_PER_TOKEN, merge_results, normalize_document, split_chunks
+
+def test_normalization_collapses_whitespace_and_controls():
+    title, content = normalize_document('  Café​  ', 'One\r\n\r\n\r\ntwo\x00  three \n four\t')
+    assert title == 'Café'
+    assert content == 'One\n\ntwo three\nfour'
+
+def test_short_text_is_one_chunk():
+    assert split_chunks('Short text.', 10) == ['Short text.']
+
+def test_chunks_follow_paragraphs_then_sentences():
+    paragraph = 'A sentence of text. ' * 10
+    text = '\n\n'.join([paragraph.strip()] * 3)
+    chunks = split_chunks(text, 30)
+    assert all(len(chunk) <= 30 * CHARS_PER_TOKEN for chunk in chunks)
+    assert all(chunk.endswith('.') for chunk in chunks)
+    assert ' '.join(' '.join(chunks).split()) == ' '.join(text.split())
+
+def test_unbroken_text_is_cut_hard():
+    chunks = split_chunks('x' * 100, 5)
+    assert [len(chunk) for chunk in chunks] == [20] * 5
+
+def test_merge_weights_scores_and_ranks_tags():
+    merged = merge_results(
+        [
+            {'summary': 'Part one.', 'score': 1.0, 'tags': ['a', 'b']},
+            {'summary': 'Part two.', 'score': 0.0, 'tags': ['b', 'c']},
+            {'summary': 'Part two.', 'score': 0.0, 'tags': ['b']},
+        ],
+        [2, 1, 1],
+    )
+    assert merged['summary'] == 'Part one. Part two.'
+    assert merged['score'] == 0.5
+    assert merged['tags'][0] == 'b'
+    assert len(merged['tags']) == 2
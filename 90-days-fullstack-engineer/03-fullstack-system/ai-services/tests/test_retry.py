@@ -0,0 +1,54 @@
+import time
+import pytest
+from services.retry import RetryPolicy, TokenBucket
+
+pytestmark = pytest.mark.anyio
+
+class Flaky:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError(f'failure {self.calls}')
+        return 'ok'
+
+def policy(**options) -> RetryPolicy:
+    return RetryPolicy(**{'max_attempts': 3, 'base_delay': 0.001, 'max_delay': 0.001, 'timeout': 1, **options})
+
+async def test_retries_until_success():
+    operation = Flaky(failures=2)
+    assert await policy().run(operation) == 'ok'
+    assert operation.calls == 3
+
+async def test_last_error_is_raised_after_the_last_attempt():
+    operation = Flaky(failures=5)
+    with pytest.raises(ConnectionError, match='failure 3'):
+        await policy().run(operation)
+
+async def test_non_retryable_errors_are_raised_at_once():
+    operation = Flaky(failures=5)
+    with pytest.raises(ConnectionError):
+        await policy(retryable=lambda exc: False).run(operation)
+    assert operation.calls == 1
+
+async def test_empty_budget_stops_retries():
+    operation = Flaky(failures=5)
+    with pytest.raises(ConnectionError):
+        await policy(budget=TokenBucket(capacity=1, refill_per_second=0)).run(operation)
+    assert operation.calls == 2
+
+async def test_retry_after_sets_the_minimum_delay():
+    delays = []
+    await policy(retry_after=lambda exc: 0.05, on_backoff=delays.append).run(Flaky(failures=1))
+    assert delays == [0.05]
+
+async def test_gives_up_when_the_wait_outlasts_the_deadline():
+    operation = Flaky(failures=1)
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        await policy(retry_after=lambda exc: 1).run(operation, deadline=time.monotonic() + 0.1)
+    assert operation.calls == 1
+    assert time.monotonic() - started < 0.1
@@ -0,0 +1,42 @@
+from services.similarity import SimHashIndex, similarity, sketch
+
+LISTING = (
+    'Bright two bedroom apartment in the city centre with a large balcony, a renovated kitchen and '
+    'parking. Close to the metro, schools and shops. Listing 4411, 72 square metres, 1450 per month.'
+)
+
+def index(max_entries: int = 10) -> SimHashIndex:
+    return SimHashIndex(max_distance=4, max_entries=max_entries, min_similarity=0.9)
+
+def test_sketch_is_deterministic_and_case_insensitive():
+    assert sketch(LISTING) == sketch(LISTING.upper())
+    assert similarity(sketch(LISTING)[1], sketch(LISTING)[1]) == 1.0
+
+def test_finds_a_near_duplicate():
+    similar = index()
+    similar.add(sketch(LISTING), 'original')
+    assert similar.find(sketch(LISTING.replace('renovated kitchen', 'new kitchen'))) == 'original'
+
+def test_different_numbers_are_not_duplicates():
+    similar = index()
+    similar.add(sketch(LISTING), 'original')
+    assert similar.find(sketch(LISTING.replace('1450', '1550'))) is None
+
+def test_unrelated_text_is_not_a_duplicate():
+    similar = index()
+    similar.add(sketch(LISTING), 'original')
+    assert similar.find(sketch('Quarterly revenue grew on strong demand for cloud services. ' * 3)) is None
+
+def test_oldest_entry_is_evicted():
+    similar = index(max_entries=1)
+    similar.add(sketch(LISTING), 'first')
+    similar.add(sketch('Quarterly revenue grew on strong demand for cloud services. ' * 3), 'second')
+    assert len(similar) == 1
+    assert similar.find(sketch(LISTING)) is None
+
+def test_removed_entry_is_not_found():
+    similar = index()
+    similar.add(sketch(LISTING), 'original')
+    similar.remove('original')
+    assert len(similar) == 0
+    assert similar.find(sketch(LISTING)) is None
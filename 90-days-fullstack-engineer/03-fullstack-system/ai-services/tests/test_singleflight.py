@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from services.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+class Operation:
+    def __init__(self, delay: float = 0.05, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return {'calls': self.calls}
+
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    operation = Operation()
+    results = await asyncio.gather(*(flight.do('key', operation) for _ in range(5)))
+    assert operation.calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+async def test_errors_are_shared():
+    flight = SingleFlight()
+    operation = Operation(error=ValueError('boom'))
+    results = await asyncio.gather(*(flight.do('key', operation) for _ in range(3)), return_exceptions=True)
+    assert operation.calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+async def test_later_calls_start_a_new_flight():
+    flight = SingleFlight()
+    operation = Operation(delay=0)
+    await flight.do('key', operation)
+    await flight.do('key', operation)
+    assert operation.calls == 2
+
+async def test_a_waiter_giving_up_does_not_cancel_the_others():
+    flight = SingleFlight()
+    operation = Operation()
+    impatient = asyncio.ensure_future(asyncio.wait_for(flight.do('key', operation), 0.01))
+    patient = asyncio.ensure_future(flight.do('key', operation))
+    with pytest.raises(asyncio.TimeoutError):
+        await impatient
+    assert await patient == {'calls': 1}
+    assert not operation.cancelled
+
+async def test_call_is_cancelled_once_every_waiter_left():
+    flight = SingleFlight()
+    operation = Operation(delay=1)
+    waiters = [asyncio.ensure_future(flight.do('key', operation)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert operation.cancelled
+    assert flight.in_flight() == 0
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from services.streaming import iter_ndjson, map_unordered
+
+pytestmark = pytest.mark.anyio
+
+async def parse(chunks: list[bytes], max_line_bytes: int = 100) -> list[tuple[int, bytes | None]]:
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    return [record async for record in iter_ndjson(body(), max_line_bytes)]
+
+async def test_lines_are_numbered_by_position():
+    assert await parse([b'{"a": 1}\n{"b": 2}\n']) == [(0, b'{"a": 1}'), (1, b'{"b": 2}')]
+
+async def test_blank_lines_are_skipped_but_counted():
+    assert await parse([b'one\n\n  \ntwo\n']) == [(0, b'one'), (3, b'two')]
+
+async def test_crlf_endings_are_dropped():
+    assert await parse([b'one\r\ntwo\r', b'\n\r\nthree\r\n']) == [(0, b'one'), (1, b'two'), (3, b'three')]
+
+async def test_final_line_without_newline():
+    assert await parse([b'one\ntw', b'o']) == [(0, b'one'), (1, b'two')]
+
+async def test_lines_split_across_chunks():
+    assert await parse([b'{"a"', b': 1}\n{"b', b'": 2}\n']) == [(0, b'{"a": 1}'), (1, b'{"b": 2}')]
+
+async def test_oversized_line_is_reported_once_and_skipped():
+    chunks = [b'ok\n', b'far too long', b' a line\nnext\n']
+    assert await parse(chunks, max_line_bytes=5) == [(0, b'ok'), (1, None), (2, b'next')]
+
+async def test_oversized_line_within_one_chunk():
+    assert await parse([b'abcdefgh\nabc\n'], max_line_bytes=5) == [(0, None), (1, b'abc')]
+
+async def test_oversized_final_line():
+    assert await parse([b'ok\n', b'abcdefgh'], max_line_bytes=5) == [(0, b'ok'), (1, None)]
+
+async def test_map_unordered_bounds_concurrency_and_yields_every_result():
+    running = 0
+    peak = 0
+
+    async def items():
+        for item in range(10):
+            yield item
+
+    async def work(item: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (item % 3))
+        running -= 1
+        return item * 2
+
+    results = [result async for result in map_unordered(items(), work, 3)]
+    assert sorted(results) == [item * 2 for item in range(10)]
+    assert peak == 3